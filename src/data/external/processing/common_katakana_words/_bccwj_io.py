@@ -0,0 +1,53 @@
+"""
+Shared BCCWJ frequency list loading for the common katakana word scripts.
+
+The raw TSV is parsed once and cached as zstd-compressed Parquet next to it;
+later runs read the cache as long as it is at least as new as the TSV, or
+the TSV is absent.
+"""
+
+from pathlib import Path
+
+import polars as pl
+
+# Paths
+RAW_FILE = Path(__file__).parent.parent.parent / "raw" / "BCCWJ_frequencylist_suw_ver1_0.tsv"
+CACHE_FILE = RAW_FILE.with_suffix(".parquet")
+
+
+def _load_bccwj() -> pl.LazyFrame:
+    """Return a lazy frame over the BCCWJ list, rebuilding the Parquet cache if stale.
+
+    A checkout with only the cache uses it as is; it is rebuilt only when the
+    TSV is present and newer (or the cache is missing).
+    """
+    stale = RAW_FILE.exists() and (
+        not CACHE_FILE.exists() or CACHE_FILE.stat().st_mtime < RAW_FILE.stat().st_mtime
+    )
+    if stale:
+        print(f"Caching {RAW_FILE.name} as {CACHE_FILE.name}...")
+        # Use 1-based TSV row number (after header) as unique key instead of rank,
+        # because multiple words can share the same rank (same frequency).
+        (
+            pl.read_csv(RAW_FILE, separator="\t")
+            .with_row_index("row_num", offset=1)
+            .write_parquet(CACHE_FILE, compression="zstd")
+        )
+    return pl.scan_parquet(CACHE_FILE)
+
+
+def load_bccwj_top_n(n: int) -> list[dict]:
+    """Load the top n foreign words (wType=外) sorted by rank.
+
+    Each row has rank, row_num, lemma and pos. maintain_order keeps ties
+    in original TSV row order.
+    """
+    return (
+        _load_bccwj()
+        .filter(pl.col("wType") == "外")
+        .select(["rank", "row_num", "lemma", "pos"])
+        .sort("rank", maintain_order=True)
+        .head(n)
+        .collect()
+        .to_dicts()
+    )
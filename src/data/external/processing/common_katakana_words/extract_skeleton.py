@@ -1,4 +1,10 @@
-#!/usr/bin/env python3
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "polars>=1.0.0",
+# ]
+# ///
 """
 Extract common katakana words from BCCWJ frequency list and generate skeleton YAML cards.
 
@@ -7,11 +13,11 @@ https://clrd.ninjal.ac.jp/bccwj/en/index.html
 https://repository.ninjal.ac.jp/records/3234
 """
 
-import csv
 from pathlib import Path
 
+from _bccwj_io import load_bccwj_top_n
+
 # Paths
-RAW_FILE = Path(__file__).parent.parent.parent / "raw" / "BCCWJ_frequencylist_suw_ver1_0.tsv"
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "processed" / "common_katakana_words"
 
 # Config
@@ -31,67 +37,47 @@ POS_TO_HINT = {
 }
 
 
-def generate_yaml(words: list[dict], lesson_num: int) -> str:
-    """Generate YAML content for skeleton cards."""
-    lines = []
-
-    for word in words:
-        lemma = word['lemma']
-        pos = word['pos']
-        row_num = word['row_num']
-        hint = POS_TO_HINT.get(pos, "")
-
-        # Generate ID: ckw-l{lesson}-{row_num}
-        # Uses TSV row number (unique) instead of rank (can have duplicates)
-        card_id = f"ckw-l{lesson_num:02d}-{row_num}"
-
-        lines.append(f"- id: {card_id}")
-        lines.append(f'  prompt: ""')
-        lines.append(f"  answers:")
-        lines.append(f"    - {lemma}")
-        lines.append(f'  hint: "{hint}"')
-        lines.append(f"  stage: -1")
-        lines.append(f"  unlocks: '9999-12-31T23:59:59+00:00'")
-        lines.append(f"  invulnerable: false")
-        lines.append(f"  max_stage: -1")
-        lines.append(f"  learned: false")
-        lines.append(f"  hidden: false")
-        lines.append(f"  befuddlers: []")
-        lines.append("")  # Blank line between entries
-
-    return "\n".join(lines)
+# Skeleton card template; entries are separated by a blank line
+CARD_TEMPLATE = (
+    "- id: {card_id}\n"
+    '  prompt: ""\n'
+    "  answers:\n"
+    "    - {lemma}\n"
+    '  hint: "{hint}"\n'
+    "  stage: -1\n"
+    "  unlocks: '9999-12-31T23:59:59+00:00'\n"
+    "  invulnerable: false\n"
+    "  max_stage: -1\n"
+    "  learned: false\n"
+    "  hidden: false\n"
+    "  befuddlers: []\n"
+)
+
+
+def write_lesson(words: list[dict], lesson_num: int, out_path: Path):
+    """Write skeleton cards for one lesson straight to out_path."""
+    hint = POS_TO_HINT.get
+    with open(out_path, 'w', encoding='utf-8') as f:
+        for i, word in enumerate(words):
+            if i:
+                f.write("\n")
+            # Generate ID: ckw-l{lesson}-{row_num}
+            # Uses TSV row number (unique) instead of rank (can have duplicates)
+            f.write(CARD_TEMPLATE.format(
+                card_id=f"ckw-l{lesson_num:02d}-{word['row_num']}",
+                lemma=word['lemma'],
+                hint=hint(word['pos'], ""),
+            ))
 
 
 def main():
-    # Load TSV and filter
-    # Use 1-based TSV row number (after header) as unique key instead of rank,
-    # because multiple words can share the same rank (same frequency).
-    rows = []
-    with open(RAW_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter='\t')
-        for row_num, row in enumerate(reader, start=1):
-            # Filter to foreign words only (wType=外)
-            if row['wType'] == '外':
-                rows.append({
-                    'rank': int(row['rank']),
-                    'row_num': row_num,
-                    'lemma': row['lemma'],
-                    'pos': row['pos']
-                })
-
-    # Sort by rank (row_num preserves original order within ties)
-    rows.sort(key=lambda x: x['rank'])
-
-    # Take top 600 words
-    rows = rows[:TOTAL_WORDS]
+    # Load top 600 foreign words (from the Parquet cache when it is fresh)
+    rows = load_bccwj_top_n(TOTAL_WORDS)
 
     print(f"Extracted {len(rows)} words")
 
     # Check for unknown POS
-    unknown_pos = set()
-    for row in rows:
-        if row['pos'] not in POS_TO_HINT:
-            unknown_pos.add(row['pos'])
+    unknown_pos = {row['pos'] for row in rows} - POS_TO_HINT.keys()
     if unknown_pos:
         print(f"WARNING: Unknown POS values: {unknown_pos}")
 
@@ -108,11 +94,8 @@ def main():
             break
 
         lesson_num = i + 1
-        yaml_content = generate_yaml(lesson_words, lesson_num)
-
         output_file = OUTPUT_DIR / f"common_katakana_skeleton_l{lesson_num:02d}.yaml"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(yaml_content)
+        write_lesson(lesson_words, lesson_num, output_file)
 
         print(f"Saved {output_file.name}: {len(lesson_words)} words (ranks {lesson_words[0]['rank']}-{lesson_words[-1]['rank']})")
 
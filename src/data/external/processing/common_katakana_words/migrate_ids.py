@@ -1,4 +1,10 @@
-#!/usr/bin/env python3
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "polars>=1.0.0",
+# ]
+# ///
 """
 Migrate common katakana word card IDs from rank-based to row-number-based.
 
@@ -11,132 +17,175 @@ This script:
 3. Updates all lesson YAML files in-place
 """
 
-import csv
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from _bccwj_io import load_bccwj_top_n
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent.parent.parent.parent
-RAW_FILE = SCRIPT_DIR.parent.parent / "raw" / "BCCWJ_frequencylist_suw_ver1_0.tsv"
 CARDS_DIR = PROJECT_ROOT / "src" / "data" / "cards" / "common_katakana_words"
 LESSONS_DIR = PROJECT_ROOT / "src" / "data" / "lessons" / "common_katakana_words"
 
 WORDS_PER_LESSON = 15
+NUM_LESSONS = 40
+
+# Threads used to read/rewrite card and lesson files concurrently
+MAX_WORKERS = 8
+
+# Line patterns for card and lesson YAML files
+_ID_LINE_RE = re.compile(r"^- id: (ckw-l\d+-\d+)$")
+_ANSWER_RE = re.compile(r"^\s+- (.+)$")
+_LESSON_ID_LINE_RE = re.compile(r"^([ \t]+- )(ckw-l\d+-\d+)$", re.MULTILINE)
+# An "ids:" line plus the following blank or indented lines
+_IDS_SECTION_RE = re.compile(r"^([ \t]*ids:.*\n)((?:(?: .*|[ \t]*)(?:\n|\Z))*)", re.MULTILINE)
+_LESSON_NUM_RE = re.compile(r"_(\d+)\.yaml$")
+_CARD_LESSON_NUM_RE = re.compile(r"_l(\d+)\.yaml$")
 
 
-def build_id_mapping() -> dict[str, str]:
-    """Build mapping from old ID (rank-based) to new ID (row-number-based).
+def _build_mappings(
+    rows: list[dict],
+) -> tuple[dict[str, dict[str, str]], list[tuple[str, str]]]:
+    """Build both ID mappings from rank-based to row-number-based IDs in one pass.
 
-    Returns dict of {old_id: new_id} for every card that changes.
+    Returns (lemma_mapping, positional_mapping):
+    - lemma_mapping: old_id -> {lemma: new_id} for ALL words (handles duplicates)
+    - positional_mapping: ordered list of (old_id, new_id) per lesson position
     """
-    # Load TSV: get all foreign words with both rank and row number
-    rows = []
-    with open(RAW_FILE, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter="\t")
-        for row_num, row in enumerate(reader, start=1):
-            if row["wType"] == "外":
-                rows.append({
-                    "rank": int(row["rank"]),
-                    "row_num": row_num,
-                    "lemma": row["lemma"],
-                })
-
-    # Sort by rank (same as extract_skeleton.py)
-    rows.sort(key=lambda x: x["rank"])
-
-    # Take top 600
-    rows = rows[:WORDS_PER_LESSON * 40]
-
-    # Build mapping: assign each word to its lesson, generate old and new IDs
-    mapping = {}
+    lemma_mapping: dict[str, dict[str, str]] = {}
+    positional_mapping = []
     for i, word in enumerate(rows):
         lesson_num = (i // WORDS_PER_LESSON) + 1
         old_id = f"ckw-l{lesson_num:02d}-{word['rank']}"
         new_id = f"ckw-l{lesson_num:02d}-{word['row_num']}"
+        lemma_mapping.setdefault(old_id, {})[word["lemma"]] = new_id
+        positional_mapping.append((old_id, new_id))
+    return lemma_mapping, positional_mapping
 
-        if old_id != new_id:
-            # Handle duplicate old_ids: if old_id already in mapping,
-            # the first word got it; this is a collision we need to resolve
-            if old_id in mapping:
-                # The first occurrence already has a mapping; this is the duplicate
-                # We need to figure out which card file entry matches this word
-                # by looking at the answer (lemma)
-                mapping[(old_id, word["lemma"])] = new_id
-            else:
-                mapping[old_id] = new_id
 
-    return mapping, rows
+def _process_card_file(
+    card_file: Path, changing_by_lesson: dict[int, dict[str, dict[str, str]]]
+) -> int:
+    """Update IDs in one card YAML file, matching by (id, first answer).
 
+    Returns the number of IDs changed.
+    """
+    # Only IDs of this file's lesson that actually change are candidates;
+    # with none, skip reading the file at all
+    match = _CARD_LESSON_NUM_RE.search(card_file.name)
+    if not match:
+        return 0
+    lemma_mapping = changing_by_lesson.get(int(match.group(1)))
+    if not lemma_mapping:
+        return 0
+
+    content = card_file.read_text(encoding="utf-8")
+    lines = content.split("\n")
+    changes = 0
+
+    # Single pass: remember the last id line, then resolve it once the
+    # first answer (the line right after "answers:") arrives
+    pending_old_id: str | None = None
+    pending_lemmas: dict[str, str] | None = None
+    pending_idx = 0
+    in_answers = False
+
+    for idx, line in enumerate(lines):
+        # Match "- id: ckw-lNN-XXXX"
+        id_match = _ID_LINE_RE.match(line)
+        if id_match:
+            # IDs absent from the mapping are left alone without looking ahead
+            old_id = id_match.group(1)
+            pending_lemmas = lemma_mapping.get(old_id)
+            pending_old_id = old_id if pending_lemmas else None
+            pending_idx = idx
+            in_answers = False
+            continue
 
-def build_lemma_mapping(rows: list[dict]) -> dict[tuple[str, str], str]:
-    """Build a (old_id, lemma) -> new_id mapping for ALL words (handles duplicates)."""
-    mapping = {}
-    for i, word in enumerate(rows):
-        lesson_num = (i // WORDS_PER_LESSON) + 1
-        old_id = f"ckw-l{lesson_num:02d}-{word['rank']}"
-        new_id = f"ckw-l{lesson_num:02d}-{word['row_num']}"
-        mapping[(old_id, word["lemma"])] = new_id
-    return mapping
+        if pending_old_id is None:
+            continue
 
+        if in_answers:
+            answer_match = _ANSWER_RE.match(line)
+            if answer_match:
+                new_id = pending_lemmas.get(answer_match.group(1))
+                if new_id is not None and new_id != pending_old_id:
+                    lines[pending_idx] = f"- id: {new_id}"
+                    changes += 1
+                pending_old_id = None
+                in_answers = False
+                continue
 
-def build_positional_mapping(rows: list[dict]) -> list[tuple[str, str]]:
-    """Build ordered list of (old_id, new_id) per lesson position."""
-    result = []
-    for i, word in enumerate(rows):
-        lesson_num = (i // WORDS_PER_LESSON) + 1
-        old_id = f"ckw-l{lesson_num:02d}-{word['rank']}"
-        new_id = f"ckw-l{lesson_num:02d}-{word['row_num']}"
-        result.append((old_id, new_id))
-    return result
+        in_answers = line.strip() == "answers:"
+
+    if changes > 0:
+        card_file.write_text("\n".join(lines), encoding="utf-8", newline="")
 
+    return changes
 
-def update_card_files(lemma_mapping: dict[tuple[str, str], str]):
+
+def update_card_files(lemma_mapping: dict[str, dict[str, str]]):
     """Update card YAML files, matching by (id, first answer)."""
     card_files = sorted(CARDS_DIR.glob("common_katakana_l*.yaml"))
 
-    total_changes = 0
-    for card_file in card_files:
-        content = card_file.read_text(encoding="utf-8")
-        lines = content.split("\n")
-        new_lines = []
-        changes = 0
-
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-
-            # Match "- id: ckw-lNN-XXXX"
-            id_match = re.match(r"^- id: (ckw-l\d+-\d+)$", line)
-            if id_match:
-                old_id = id_match.group(1)
-
-                # Look ahead to find the first answer (lemma)
-                lemma = None
-                for j in range(i + 1, min(i + 10, len(lines))):
-                    answer_match = re.match(r"^\s+- (.+)$", lines[j])
-                    if answer_match and lines[j - 1].strip() == "answers:":
-                        lemma = answer_match.group(1)
-                        break
-
-                key = (old_id, lemma)
-                if key in lemma_mapping:
-                    new_id = lemma_mapping[key]
-                    if old_id != new_id:
-                        new_lines.append(f"- id: {new_id}")
-                        changes += 1
-                        i += 1
-                        continue
-
-            new_lines.append(line)
-            i += 1
-
-        if changes > 0:
-            card_file.write_text("\n".join(new_lines), encoding="utf-8")
-            print(f"  {card_file.name}: {changes} IDs updated")
-            total_changes += changes
-
-    return total_changes
+    # Group the old IDs that map to a different new ID by lesson number
+    changing_by_lesson: dict[int, dict[str, dict[str, str]]] = {}
+    for old_id, lemmas in lemma_mapping.items():
+        if any(new_id != old_id for new_id in lemmas.values()):
+            lesson_num = int(old_id.split("-")[1][1:])  # "ckw-l01-142" -> 1
+            changing_by_lesson.setdefault(lesson_num, {})[old_id] = lemmas
+
+    # Files are small and independent; overlap their I/O across threads
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        changes = list(ex.map(lambda p: _process_card_file(p, changing_by_lesson), card_files))
+
+    for card_file, n in zip(card_files, changes):
+        if n > 0:
+            print(f"  {card_file.name}: {n} IDs updated")
+
+    return sum(changes)
+
+
+def _process_lesson_file(lesson_file: Path, lessons: dict[int, list[tuple[str, str]]]) -> int:
+    """Update IDs in one lesson YAML file, positionally within its ids: section.
+
+    Returns the number of IDs changed.
+    """
+    # Extract lesson number from filename
+    match = _LESSON_NUM_RE.search(lesson_file.name)
+    if not match:
+        return 0
+    lesson_num = int(match.group(1))
+
+    if lesson_num not in lessons:
+        return 0
+
+    content = lesson_file.read_text(encoding="utf-8")
+
+    # old_id can appear twice (the duplicate!), so replace in order:
+    # positional replacement within the ids: section, leaving the rest
+    # of the file untouched
+    new_ids = iter([new_id for _, new_id in lessons[lesson_num]])
+    changes = 0
+
+    def _sub_id(m: re.Match) -> str:
+        nonlocal changes
+        new_id = next(new_ids, None)
+        if new_id is None or new_id == m.group(2):
+            return m.group(0)
+        changes += 1
+        return f"{m.group(1)}{new_id}"
+
+    content = _IDS_SECTION_RE.sub(
+        lambda m: m.group(1) + _LESSON_ID_LINE_RE.sub(_sub_id, m.group(2)), content
+    )
+
+    if changes > 0:
+        lesson_file.write_text(content, encoding="utf-8", newline="")
+
+    return changes
 
 
 def update_lesson_files(positional_mapping: list[tuple[str, str]]):
@@ -148,69 +197,21 @@ def update_lesson_files(positional_mapping: list[tuple[str, str]]):
         lessons.setdefault(lesson_num, []).append((old_id, new_id))
 
     lesson_files = sorted(LESSONS_DIR.glob("lesson_common_katakana_*.yaml"))
-    total_changes = 0
-
-    for lesson_file in lesson_files:
-        # Extract lesson number from filename
-        match = re.search(r"_(\d+)\.yaml$", lesson_file.name)
-        if not match:
-            continue
-        lesson_num = int(match.group(1))
-
-        if lesson_num not in lessons:
-            continue
-
-        content = lesson_file.read_text(encoding="utf-8")
-
-        # Build a replacement map for this lesson: old_id -> new_id
-        # But old_id can appear twice (the duplicate!), so we need to replace
-        # in order. Use positional replacement within the ids: section.
-        pairs = lessons[lesson_num]
-
-        # Parse the ids section
-        lines = content.split("\n")
-        new_lines = []
-        in_ids = False
-        id_index = 0
-        changes = 0
-
-        for line in lines:
-            if line.strip() == "ids:" or line.strip().startswith("ids:"):
-                in_ids = True
-                new_lines.append(line)
-                continue
-
-            if in_ids:
-                id_line_match = re.match(r"^(\s+- )(ckw-l\d+-\d+)$", line)
-                if id_line_match:
-                    indent = id_line_match.group(1)
-                    old_id = id_line_match.group(2)
-                    if id_index < len(pairs):
-                        _, new_id = pairs[id_index]
-                        if old_id != new_id:
-                            new_lines.append(f"{indent}{new_id}")
-                            changes += 1
-                            id_index += 1
-                            continue
-                    id_index += 1
-                elif line.strip() and not line.startswith(" "):
-                    in_ids = False
 
-            new_lines.append(line)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        changes = list(ex.map(lambda p: _process_lesson_file(p, lessons), lesson_files))
 
-        if changes > 0:
-            lesson_file.write_text("\n".join(new_lines), encoding="utf-8")
-            print(f"  {lesson_file.name}: {changes} IDs updated")
-            total_changes += changes
+    for lesson_file, n in zip(lesson_files, changes):
+        if n > 0:
+            print(f"  {lesson_file.name}: {n} IDs updated")
 
-    return total_changes
+    return sum(changes)
 
 
 def main():
     print("Building ID mapping from TSV...")
-    _, rows = build_id_mapping()
-    lemma_mapping = build_lemma_mapping(rows)
-    positional_mapping = build_positional_mapping(rows)
+    rows = load_bccwj_top_n(WORDS_PER_LESSON * NUM_LESSONS)
+    lemma_mapping, positional_mapping = _build_mappings(rows)
 
     # Count how many IDs actually change
     changed = sum(1 for old, new in positional_mapping if old != new)
@@ -218,9 +219,10 @@ def main():
     print()
 
     # Show duplicate ranks that caused the problem
-    from collections import Counter
-    old_ids = [old for old, _ in positional_mapping]
-    dupes = {id: count for id, count in Counter(old_ids).items() if count > 1}
+    counts: dict[str, int] = {}
+    for old, _ in positional_mapping:
+        counts[old] = counts.get(old, 0) + 1
+    dupes = {id: count for id, count in counts.items() if count > 1}
     if dupes:
         print(f"  Found {len(dupes)} duplicate rank-based IDs:")
         for dup_id, count in sorted(dupes.items()):
@@ -13,30 +13,54 @@ Process common katakana word skeleton files into complete MojiDoodle card YAML.
 Uses OpenAI to generate English meanings and befuddlers for each katakana word.
 
 Usage:
-    uv run process_common_katakana_lesson.py <lesson_number>
+    uv run process_common_katakana_lesson.py <lesson_number> [<lesson_number> ...]
     uv run process_common_katakana_lesson.py 01
+    uv run process_common_katakana_lesson.py 01 02 03
+    uv run process_common_katakana_lesson.py 1-40
     uv run process_common_katakana_lesson.py 01 --dry-run
+    uv run process_common_katakana_lesson.py 01 --cache
 """
 
 import argparse
+import asyncio
+import hashlib
 import json
 import os
+import re
+import sqlite3
 import sys
 from pathlib import Path
+from typing import NamedTuple
 
 import yaml
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, AsyncStream, BadRequestError
+
+# Prefer libyaml's C loader for reading; fall back to pure Python if unavailable.
+# Writing always uses the pure Python SafeDumper: the C emitter folds long
+# scalars and escapes non-BMP characters differently, so output would depend
+# on how PyYAML was built.
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
 # Paths relative to this script
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent.parent.parent.parent
 SKELETON_DIR = SCRIPT_DIR.parent.parent / "processed" / "common_katakana_words"
 OUTPUT_DIR = PROJECT_ROOT / "src" / "data" / "cards" / "common_katakana_words"
+CACHE_PATH = SCRIPT_DIR / ".openai_cache.db"
+
+# Default OpenAI model
+DEFAULT_MODEL = "gpt-5-mini"
 
 # Batch size for API calls
 BATCH_SIZE = 5
 
+# Maximum number of API calls in flight at once
+CONCURRENCY = 8
+
 # Few-shot examples for the prompt
 FEW_SHOT_EXAMPLES = """
 Example 1:
@@ -105,7 +129,7 @@ Output JSON:
 {"prompt": "television, TV", "befuddlers": []}
 """
 
-SYSTEM_PROMPT = """You are a Japanese language expert helping create flashcards for a handwriting practice app.
+SYSTEM_PROMPT_BODY = """You are a Japanese language expert helping create flashcards for a handwriting practice app.
 
 For each katakana loanword, provide:
 1. "prompt": The English meaning shown to the user (a simple string, e.g. "computer" or "email, mail")
@@ -125,6 +149,10 @@ Befuddler rules:
 
 Return ONLY valid JSON with no markdown, no explanation, just the raw JSON object."""
 
+# Few-shot examples live in the system prompt so every batch shares an
+# identical prefix, which OpenAI's automatic prompt caching can reuse
+SYSTEM_PROMPT = SYSTEM_PROMPT_BODY + "\n\nExamples:\n" + FEW_SHOT_EXAMPLES
+
 
 def load_dotenv_files():
     """Load .env files from script dir and project root."""
@@ -132,92 +160,236 @@ def load_dotenv_files():
     load_dotenv(PROJECT_ROOT / ".env")
 
 
-def load_skeleton(lesson_num: str) -> list[dict]:
-    """Load a skeleton YAML file."""
+class SkeletonCard(NamedTuple):
+    """The fields of a skeleton card that processing actually needs."""
+    id: str
+    lemma: str
+    hint: str
+
+
+def open_cache(path: Path = CACHE_PATH) -> sqlite3.Connection:
+    """Open (creating if needed) the on-disk cache of per-card API results."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY, json TEXT)")
+    return conn
+
+
+def cache_key(model: str, card: SkeletonCard) -> str:
+    """Cache key for a card: a hash of the request that would process it alone.
+
+    Covers the model, system prompt, examples, user prompt and request options,
+    so editing any of them invalidates earlier results. The card id is replaced
+    by a placeholder, so a lemma and hint repeated across lessons share one entry.
+    """
+    request = build_request([card._replace(id="-")], model)
+    request = json.dumps(request, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+def cache_get(conn: sqlite3.Connection, key: str) -> dict | None:
+    """Return the cached result for key, or None on a miss."""
+    row = conn.execute("SELECT json FROM items WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def cache_put(conn: sqlite3.Connection, items: list[tuple[str, dict]]):
+    """Store (key, result) pairs in the cache."""
+    conn.executemany(
+        "INSERT OR REPLACE INTO items (key, json) VALUES (?, ?)",
+        [(key, json.dumps(result, ensure_ascii=False)) for key, result in items]
+    )
+    conn.commit()
+
+
+def load_skeleton(lesson_num: str) -> list[SkeletonCard]:
+    """Load a skeleton YAML file, keeping only each card's id, first answer and hint."""
     skeleton_path = SKELETON_DIR / f"common_katakana_skeleton_l{lesson_num}.yaml"
     if not skeleton_path.exists():
         raise FileNotFoundError(f"Skeleton file not found: {skeleton_path}")
 
+    # Walk the composed node graph instead of constructing full card dicts
     with open(skeleton_path, "r", encoding="utf-8") as f:
-        cards = yaml.safe_load(f)
+        root = yaml.compose(f, Loader=_Loader)
+
+    if root is None:
+        return []
+
+    cards = []
+    for card_node in root.value:
+        fields = {key.value: value for key, value in card_node.value}
+        cards.append(SkeletonCard(
+            id=fields["id"].value,
+            lemma=fields["answers"].value[0].value,
+            hint=fields["hint"].value,
+        ))
 
     return cards
 
 
-def card_to_yaml_string(card: dict) -> str:
-    """Convert a card dict to YAML string for the prompt."""
-    return yaml.dump([card], allow_unicode=True, default_flow_style=False)
+def _format_prompt_card(card: SkeletonCard) -> str:
+    """Format the fields the model needs from a skeleton card, in the few-shot YAML shape."""
+    return (
+        f"- id: {card.id}\n"
+        '  prompt: ""\n'
+        "  answers:\n"
+        f"    - {card.lemma}\n"
+        f'  hint: "{card.hint}"\n'
+    )
 
 
-def create_batch_prompt(cards: list[dict]) -> str:
+def create_batch_prompt(cards: list[SkeletonCard]) -> str:
     """Create a prompt for a batch of cards."""
-    cards_yaml = "\n---\n".join(card_to_yaml_string(card) for card in cards)
+    # Skeleton cards have a fixed shape, so skip the YAML dumper entirely
+    cards_yaml = "---\n".join(_format_prompt_card(card) for card in cards)
 
     return f"""Process these {len(cards)} katakana word cards. For each card, return a JSON object with "prompt" and "befuddlers".
 
 Return a JSON array with exactly {len(cards)} objects, one per card, in the same order.
 
-{FEW_SHOT_EXAMPLES}
-
 Cards to process:
 {cards_yaml}
 
 Return ONLY a valid JSON array, no other text."""
 
 
-def validate_response(response: list, expected_count: int) -> tuple[bool, str]:
-    """Validate the API response structure."""
-    if not isinstance(response, list):
-        return False, "Response is not a list"
+def _validate_item(i: int, item) -> str:
+    """Validate one card result. Returns an error message, or "" if valid."""
+    if not isinstance(item, dict):
+        return f"Item {i} is not a dict"
 
-    if len(response) != expected_count:
-        return False, f"Expected {expected_count} items, got {len(response)}"
+    if "prompt" not in item:
+        return f"Item {i} missing 'prompt'"
 
-    for i, item in enumerate(response):
-        if not isinstance(item, dict):
-            return False, f"Item {i} is not a dict"
+    if not isinstance(item["prompt"], str):
+        return f"Item {i} 'prompt' is not a string"
 
-        if "prompt" not in item:
-            return False, f"Item {i} missing 'prompt'"
+    if len(item["prompt"].strip()) == 0:
+        return f"Item {i} has empty prompt"
 
-        if not isinstance(item["prompt"], str):
-            return False, f"Item {i} 'prompt' is not a string"
+    if "befuddlers" not in item:
+        return f"Item {i} missing 'befuddlers'"
 
-        if len(item["prompt"].strip()) == 0:
-            return False, f"Item {i} has empty prompt"
+    if not isinstance(item["befuddlers"], list):
+        return f"Item {i} 'befuddlers' is not a list"
 
-        if "befuddlers" not in item:
-            return False, f"Item {i} missing 'befuddlers'"
+    if len(item["befuddlers"]) > 4:
+        return f"Item {i} has more than 4 befuddlers"
 
-        if not isinstance(item["befuddlers"], list):
-            return False, f"Item {i} 'befuddlers' is not a list"
+    for j, bef in enumerate(item["befuddlers"]):
+        if not isinstance(bef, dict):
+            return f"Item {i} befuddler {j} is not a dict"
+        if "answer" not in bef or "toast" not in bef:
+            return f"Item {i} befuddler {j} missing answer or toast"
+        if not isinstance(bef["toast"], str):
+            return f"Item {i} befuddler {j} 'toast' is not a string"
 
-        if len(item["befuddlers"]) > 4:
-            return False, f"Item {i} has more than 4 befuddlers"
+    return ""
 
-        for j, bef in enumerate(item["befuddlers"]):
-            if not isinstance(bef, dict):
-                return False, f"Item {i} befuddler {j} is not a dict"
-            if "answer" not in bef or "toast" not in bef:
-                return False, f"Item {i} befuddler {j} missing answer or toast"
 
-    return True, ""
+def validate_response(response: list, expected_count: int) -> tuple[bool, str]:
+    """Validate the API response structure."""
+    if not isinstance(response, list):
+        return False, "Response is not a list"
 
+    if len(response) != expected_count:
+        return False, f"Expected {expected_count} items, got {len(response)}"
+
+    for i, item in enumerate(response):
+        error = _validate_item(i, item)
+        if error:
+            return False, error
+
+    return True, ""
 
-def process_batch(client: OpenAI, cards: list[dict], model: str) -> list[dict]:
-    """Process a batch of cards through the API."""
-    prompt = create_batch_prompt(cards)
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
+# Start of the card array: a bare array, or one wrapped as {"results": [...]}
+# or {"cards": [...]}. Any other shape is left to the full-document parse.
+_ARRAY_START_RE = re.compile(r'\s*(?:\{\s*"(?:results|cards)"\s*:\s*)?\[')
+# Enough of the document to tell whether it can still be one of those shapes
+_FIRST_TOKEN_RE = re.compile(r'\s*(?:\[|\{\s*"[^"]*"\s*:\s*\S)')
+
+
+class _ArrayItemScanner:
+    """Incrementally decode the items of the card array in a growing JSON string."""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._pos: int | None = None  # index of the next item, once the array is found
+        self._skip = False  # set once the response turns out not to be a card array
+        self.count = 0
+
+    def feed(self, text: str) -> list[tuple[int, object]]:
+        """Return (index, item) for items completed in text (everything received so far)."""
+        if self._skip:
+            return []
+        if self._pos is None:
+            match = _ARRAY_START_RE.match(text)
+            if not match:
+                # e.g. a single card object; only the final parse handles it
+                self._skip = _FIRST_TOKEN_RE.match(text) is not None
+                return []
+            self._pos = match.end()
+
+        items = []
+        while True:
+            pos = self._pos
+            while pos < len(text) and text[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(text) or text[pos] == "]":
+                return items
+            try:
+                item, self._pos = self._decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                # Item not complete yet; wait for more
+                return items
+            items.append((self.count, item))
+            self.count += 1
+
+
+async def _read_stream(stream: AsyncStream, expected_count: int) -> str:
+    """Collect a streamed completion, validating each card result as soon as it completes."""
+    scanner = _ArrayItemScanner()
+    content = ""
+    async with stream:
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            content += chunk.choices[0].delta.content
+            for i, item in scanner.feed(content):
+                if i >= expected_count:
+                    error = f"Expected {expected_count} items, got more"
+                else:
+                    error = _validate_item(i, item)
+                if error:
+                    raise ValueError(f"Invalid response structure: {error}\nContent: {content[:500]}")
+    return content
+
+
+def build_request(cards: list[SkeletonCard], model: str) -> dict:
+    """Build the chat completion request for a batch of cards."""
+    return {
+        "model": model,
+        "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt}
+            {"role": "user", "content": create_batch_prompt(cards)}
         ],
-        response_format={"type": "json_object"}
-    )
+        "response_format": {"type": "json_object"},
+    }
 
-    content = response.choices[0].message.content
+
+async def process_batch(client: AsyncOpenAI, cards: list[SkeletonCard], model: str) -> list[dict]:
+    """Process a batch of cards through the API."""
+    request = build_request(cards, model)
+
+    # Stream so each card result is checked while the rest is still arriving
+    try:
+        stream = await client.chat.completions.create(**request, stream=True)
+    except BadRequestError:
+        # Streaming not available for this model/organization
+        response = await client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+    else:
+        content = await _read_stream(stream, len(cards))
 
     # Parse JSON response
     try:
@@ -244,42 +416,61 @@ def process_batch(client: OpenAI, cards: list[dict], model: str) -> list[dict]:
     return parsed
 
 
-def normalize_string(s: str) -> str:
-    """Convert escaped newlines to actual newlines."""
-    if not isinstance(s, str):
-        return s
-    return s.replace("\\n", "\n")
-
-
-def apply_results_to_cards(cards: list[dict], results: list[dict]) -> list[dict]:
+async def _run_all(
+    batches: list[list[SkeletonCard]], model: str, concurrency: int
+) -> list[list[dict] | Exception]:
+    """Process all batches concurrently, at most `concurrency` at a time.
+
+    Results come back in input order. A failed batch yields its exception
+    instead of a result list so sibling batches are not lost.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    num_batches = len(batches)
+
+    async def _bounded(batch_idx: int, batch_cards: list[SkeletonCard]) -> list[dict] | Exception:
+        words = ", ".join(c.lemma for c in batch_cards)
+        async with sem:
+            try:
+                results = await process_batch(client, batch_cards, model)
+            except Exception as e:
+                print(f"Batch {batch_idx + 1}/{num_batches}: {words}... ✗ Error: {e}")
+                return e
+        print(f"Batch {batch_idx + 1}/{num_batches}: {words}... ✓")
+        return results
+
+    async with AsyncOpenAI() as client:
+        return await asyncio.gather(*(_bounded(i, b) for i, b in enumerate(batches)))
+
+
+# Fixed SRS state for newly generated cards
+_CARD_DEFAULTS = {
+    "stage": -1,
+    "unlocks": "9999-12-31T23:59:59+00:00",
+    "invulnerable": False,
+    "max_stage": -1,
+    "learned": False,
+    "hidden": False,
+}
+
+
+def apply_results_to_cards(cards: list[SkeletonCard], results: list[dict]) -> list[dict]:
     """Apply API results to the card data."""
-    updated_cards = []
-
-    for card, result in zip(cards, results):
-        # Process befuddlers
-        befuddlers = []
-        for bef in result["befuddlers"]:
-            befuddlers.append({
-                "answers": [bef["answer"]],
-                "toast": normalize_string(bef["toast"])
-            })
-
-        updated_card = {
-            "id": card["id"],
+    updated_cards = [None] * len(cards)
+
+    for idx, (card, result) in enumerate(zip(cards, results)):
+        updated_cards[idx] = {
+            "id": card.id,
             "prompt": result["prompt"],
-            "answers": card["answers"],
-            "hint": card["hint"],
-            "stage": -1,
-            "unlocks": "9999-12-31T23:59:59+00:00",
-            "invulnerable": False,
-            "max_stage": -1,
-            "learned": False,
-            "hidden": False,
-            "befuddlers": befuddlers
+            "answers": [card.lemma],
+            "hint": card.hint,
+            **_CARD_DEFAULTS,
+            # Convert escaped newlines in toasts to actual newlines
+            "befuddlers": [
+                {"answers": [bef["answer"]], "toast": bef["toast"].replace("\\n", "\n")}
+                for bef in result["befuddlers"]
+            ],
         }
 
-        updated_cards.append(updated_card)
-
     return updated_cards
 
 
@@ -290,20 +481,11 @@ def _str_representer(dumper, data):
     return dumper.represent_scalar('tag:yaml.org,2002:str', data)
 
 
-# Register the custom representer globally
-yaml.add_representer(str, _str_representer)
-
-
 class IndentedDumper(yaml.SafeDumper):
     """Custom YAML dumper with proper indentation for nested lists."""
     pass
 
-def _str_representer_indented(dumper, data):
-    if '\n' in data:
-        return dumper.represent_scalar('tag:yaml.org,2002:str', data, style='|')
-    return dumper.represent_scalar('tag:yaml.org,2002:str', data)
-
-IndentedDumper.add_representer(str, _str_representer_indented)
+IndentedDumper.add_representer(str, _str_representer)
 
 def write_yaml_file(cards: list[dict], output_path: Path):
     """Write cards to YAML file with proper formatting."""
@@ -314,20 +496,49 @@ def write_yaml_file(cards: list[dict], output_path: Path):
                   default_flow_style=False, sort_keys=False, indent=2)
 
 
+def parse_lessons(specs: list[str]) -> list[str]:
+    """Expand lesson arguments ('01', '1-40') into 2-digit lesson numbers, in order.
+
+    Raises ValueError for malformed or reversed ranges and for an empty result.
+    """
+    lessons = []
+    for spec in specs:
+        start, sep, end = spec.partition("-")
+        if sep:
+            first, last = int(start), int(end)
+            if first > last:
+                raise ValueError(f"reversed lesson range: {spec}")
+            lessons.extend(str(n).zfill(2) for n in range(first, last + 1))
+        else:
+            lessons.append(spec.zfill(2))
+    if not lessons:
+        raise ValueError("no lessons given")
+    return list(dict.fromkeys(lessons))
+
+
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Process common katakana word skeletons into complete cards"
     )
     parser.add_argument(
-        "lesson",
+        "lessons",
         type=str,
-        help="Lesson number (e.g., '01', '02', ...)"
+        nargs="+",
+        help="Lesson numbers or ranges (e.g., '01', '01 02', '1-40')"
     )
     parser.add_argument(
         "--model",
         type=str,
-        default="gpt-5-mini",
-        help="OpenAI model to use (default: gpt-4o-mini)"
+        default=DEFAULT_MODEL,
+        help=f"OpenAI model to use (default: {DEFAULT_MODEL})"
     )
     parser.add_argument(
         "--dry-run",
@@ -336,15 +547,28 @@ def main():
     )
     parser.add_argument(
         "--batch-size",
-        type=int,
+        type=positive_int,
         default=BATCH_SIZE,
         help=f"Cards per API call (default: {BATCH_SIZE})"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=CONCURRENCY,
+        help=f"Maximum concurrent API calls (default: {CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=f"Cache API results per card in {CACHE_PATH.name} so re-runs reuse them"
+    )
 
     args = parser.parse_args()
 
-    # Normalize lesson number to 2 digits
-    lesson_num = args.lesson.zfill(2)
+    try:
+        lesson_nums = parse_lessons(args.lessons)
+    except ValueError as e:
+        parser.error(f"invalid lesson: {' '.join(args.lessons)} ({e})")
 
     # Load environment variables
     load_dotenv_files()
@@ -355,68 +579,108 @@ def main():
         print("Set it in .env file or export OPENAI_API_KEY=...")
         sys.exit(1)
 
-    print(f"Processing lesson {lesson_num}")
+    print(f"Processing lesson{'s' if len(lesson_nums) > 1 else ''} {', '.join(lesson_nums)}")
     print(f"Model: {args.model}")
     print(f"Batch size: {args.batch_size}")
+    print(f"Concurrency: {args.concurrency}")
     print()
 
-    # Load skeleton
-    try:
-        cards = load_skeleton(lesson_num)
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
-        sys.exit(1)
-
-    print(f"Loaded {len(cards)} cards from skeleton")
-    print()
-
-    # Initialize OpenAI client
-    client = OpenAI()
-
-    # Process in batches
-    all_results = []
-    num_batches = (len(cards) + args.batch_size - 1) // args.batch_size
-
-    for batch_idx in range(num_batches):
-        start = batch_idx * args.batch_size
-        end = min(start + args.batch_size, len(cards))
-        batch_cards = cards[start:end]
-
-        words = [c["answers"][0] for c in batch_cards]
-        print(f"Batch {batch_idx + 1}/{num_batches}: {', '.join(words)}...", end=" ", flush=True)
-
+    # Load skeletons; all lessons' cards share one index space so every
+    # batch of every lesson goes into a single gather
+    cards: list[SkeletonCard] = []
+    lesson_ranges: dict[str, range] = {}
+    for lesson_num in lesson_nums:
         try:
-            results = process_batch(client, batch_cards, args.model)
-            all_results.extend(results)
-            print("✓")
-        except Exception as e:
-            print(f"✗ Error: {e}")
+            lesson_cards = load_skeleton(lesson_num)
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
             sys.exit(1)
+        lesson_ranges[lesson_num] = range(len(cards), len(cards) + len(lesson_cards))
+        cards.extend(lesson_cards)
+        print(f"Loaded {len(lesson_cards)} cards from skeleton"
+              + (f" (lesson {lesson_num})" if len(lesson_nums) > 1 else ""))
 
     print()
 
-    # Apply results to cards
-    print("Applying results to cards...")
-    updated_cards = apply_results_to_cards(cards, all_results)
-    print("✓")
+    # Reuse cached results; only cards without one go to the API
+    cache = open_cache() if args.cache else None
+    results_by_idx: dict[int, dict] = {}
+    to_call = {lesson_num: [] for lesson_num in lesson_nums}
+    for lesson_num, idxs in lesson_ranges.items():
+        for idx in idxs:
+            hit = cache_get(cache, cache_key(args.model, cards[idx])) if cache else None
+            if hit is not None:
+                results_by_idx[idx] = hit
+            else:
+                to_call[lesson_num].append(idx)
+
+    if cache:
+        print(f"Cache: {len(results_by_idx)}/{len(cards)} cards already processed")
+        print()
+
+    # Process in batches (never spanning lessons), all concurrently
+    batch_idxs = [
+        idxs[i:i + args.batch_size]
+        for idxs in to_call.values()
+        for i in range(0, len(idxs), args.batch_size)
+    ]
+    batches = [[cards[idx] for idx in batch] for batch in batch_idxs]
+    results_nested = asyncio.run(_run_all(batches, args.model, args.concurrency)) if batches else []
+
+    # Keep successful batches (and cache them) even if siblings failed,
+    # so an interrupted run can resume
+    for batch, results in zip(batch_idxs, results_nested):
+        if isinstance(results, Exception):
+            continue
+        results_by_idx.update(zip(batch, results))
+        if cache:
+            cache_put(cache, [(cache_key(args.model, cards[idx]), result)
+                              for idx, result in zip(batch, results)])
+    if cache:
+        cache.close()
+
+    failed = [i + 1 for i, r in enumerate(results_nested) if isinstance(r, Exception)]
+
     print()
 
-    # Output
-    output_path = OUTPUT_DIR / f"common_katakana_l{lesson_num}.yaml"
+    # Lessons with every card processed are written even if others failed
+    for i, (lesson_num, idxs) in enumerate(lesson_ranges.items()):
+        if i:
+            print()
+        if any(idx not in results_by_idx for idx in idxs):
+            print(f"✗ Skipping lesson {lesson_num}: some batches failed")
+            continue
 
-    if args.dry_run:
-        print("--- DRY RUN OUTPUT ---")
-        print(yaml.dump(updated_cards, allow_unicode=True, default_flow_style=False, sort_keys=False))
-    else:
-        print(f"Writing to {output_path}...")
-        write_yaml_file(updated_cards, output_path)
+        lesson_cards = cards[idxs.start:idxs.stop]
+        all_results = [results_by_idx[idx] for idx in idxs]
+
+        # Apply results to cards
+        print("Applying results to cards...")
+        updated_cards = apply_results_to_cards(lesson_cards, all_results)
         print("✓")
+        print()
+
+        # Output
+        output_path = OUTPUT_DIR / f"common_katakana_l{lesson_num}.yaml"
+
+        if args.dry_run:
+            print("--- DRY RUN OUTPUT ---")
+            print(yaml.dump(updated_cards, Dumper=IndentedDumper, allow_unicode=True,
+                            default_flow_style=False, sort_keys=False))
+        else:
+            print(f"Writing to {output_path}...")
+            write_yaml_file(updated_cards, output_path)
+            print("✓")
 
-    print()
-    print(f"Summary: {len(updated_cards)} cards processed")
-    for card in updated_cards:
-        bef_count = len(card["befuddlers"])
-        print(f"  - {card['answers'][0]}: {card['prompt']} ({bef_count} befuddlers)")
+        print()
+        print(f"Summary: {len(updated_cards)} cards processed")
+        for card in updated_cards:
+            bef_count = len(card["befuddlers"])
+            print(f"  - {card['answers'][0]}: {card['prompt']} ({bef_count} befuddlers)")
+
+    if failed:
+        print(f"\n✗ {len(failed)}/{len(batches)} batches failed: {', '.join(map(str, failed))}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
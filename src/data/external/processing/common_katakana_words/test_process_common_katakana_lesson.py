@@ -0,0 +1,38 @@
+"""
+Tests for process_common_katakana_lesson.py.
+
+Run with: uv run --with pytest --with openai --with python-dotenv --with pyyaml pytest
+"""
+
+import pytest
+
+from process_common_katakana_lesson import SkeletonCard, cache_key, parse_lessons
+
+
+def test_cache_key_ignores_card_id():
+    """The same lemma and hint in two lessons share one cache entry."""
+    first = SkeletonCard(id="ckw-l03-1234", lemma="サイズ", hint="")
+    second = SkeletonCard(id="ckw-l17-1234", lemma="サイズ", hint="")
+    assert cache_key("gpt-5-mini", first) == cache_key("gpt-5-mini", second)
+
+
+def test_cache_key_depends_on_model_lemma_and_hint():
+    card = SkeletonCard(id="ckw-l01-1", lemma="サイズ", hint="")
+    key = cache_key("gpt-5-mini", card)
+    assert cache_key("gpt-4o", card) != key
+    assert cache_key("gpt-5-mini", card._replace(lemma="ツー")) != key
+    assert cache_key("gpt-5-mini", card._replace(hint="size")) != key
+
+
+def test_parse_lessons_expands_ranges_in_order():
+    assert parse_lessons(["3", "01-02", "03"]) == ["03", "01", "02"]
+
+
+def test_parse_lessons_rejects_reversed_range():
+    with pytest.raises(ValueError, match="reversed"):
+        parse_lessons(["05-03"])
+
+
+def test_parse_lessons_rejects_empty_set():
+    with pytest.raises(ValueError, match="no lessons"):
+        parse_lessons([])
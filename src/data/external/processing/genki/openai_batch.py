@@ -0,0 +1,91 @@
+"""
+Run chat completion requests through the OpenAI Batch API.
+
+Batch jobs complete within 24 hours at half the cost of regular requests,
+which suits offline card generation where nobody is waiting on the result.
+"""
+
+import json
+import time
+
+from openai import OpenAI
+
+# Seconds between batch status checks
+POLL_INTERVAL = 30
+
+# Batch statuses after which the job will not make further progress
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_request(custom_id: str, model: str, messages: list[dict], **params) -> dict:
+    """Build one JSONL request line for the chat completions endpoint."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": model, "messages": messages, **params},
+    }
+
+
+def submit_batch(client: OpenAI, requests: list[dict]) -> str:
+    """Upload the requests as a JSONL file and start a batch job. Returns the batch ID."""
+    jsonl = "".join(json.dumps(request, ensure_ascii=False) + "\n" for request in requests)
+    input_file = client.files.create(file=("batch.jsonl", jsonl.encode("utf-8")), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+
+def wait_for_batch(client: OpenAI, batch_id: str, poll_interval: float = POLL_INTERVAL):
+    """Poll a batch job until it reaches a terminal status, printing progress."""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        progress = f" ({counts.completed}/{counts.total} done, {counts.failed} failed)" if counts else ""
+        print(f"  Batch {batch_id}: {batch.status}{progress}")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def download_results(client: OpenAI, batch) -> dict[str, str | Exception]:
+    """Map each custom_id to its response content, or an exception if the request failed."""
+    results: dict[str, str | Exception] = {}
+
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                error = record.get("error") or response.get("body", {}).get("error")
+                results[record["custom_id"]] = RuntimeError(f"Batch request failed: {error}")
+            else:
+                results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+
+    return results
+
+
+def run_batch(requests: list[dict], client: OpenAI | None = None,
+              poll_interval: float = POLL_INTERVAL) -> dict[str, str | Exception]:
+    """Submit requests as one batch job, wait for it, and return results by custom_id.
+
+    Requests missing from the output (e.g. the job expired) map to an exception.
+    """
+    client = client or OpenAI()
+    batch_id = submit_batch(client, requests)
+    print(f"  Submitted batch {batch_id} with {len(requests)} requests")
+
+    batch = wait_for_batch(client, batch_id, poll_interval)
+    results = download_results(client, batch)
+
+    for request in requests:
+        if request["custom_id"] not in results:
+            results[request["custom_id"]] = RuntimeError(f"No result (batch {batch.status})")
+    return results
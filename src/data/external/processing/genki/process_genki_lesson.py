@@ -4,6 +4,8 @@
 # dependencies = [
 #     "langchain>=0.3.0",
 #     "langchain-openai>=0.2.0",
+#     "openai>=1.0.0",
+#     "pydantic>=2.0",
 #     "python-dotenv>=1.0.0",
 #     "pyyaml>=6.0",
 # ]
@@ -16,24 +18,52 @@ Usage:
 
 Example:
     uv run process_genki_lesson.py ../processed/genki_vocab_L00.csv ../../cards/genki/genki_vocab_00.yaml --prefix g-00-
+    uv run process_genki_lesson.py ../processed/genki_vocab_L00.csv ../../cards/genki/genki_vocab_00.yaml --prefix g-00- --use-batch-api
 """
 
 import argparse
+import asyncio
 import csv
+import json
 import os
+import re
+import sqlite3
 import sys
+import threading
 from pathlib import Path
 
 import yaml
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from pydantic import BaseModel
+
+from openai_batch import build_request, run_batch
+
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
 
 # Paths relative to this script
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent.parent
+CACHE_PATH = SCRIPT_DIR / ".langchain_cache.db"
+
+# Default OpenAI model
+DEFAULT_MODEL = "gpt-5.2"
+# Sampling temperature for all LLM calls
+TEMPERATURE = 0.3
+# Maximum concurrent LLM calls in Phase 1
+CONCURRENCY = 16
+# Vocabulary items per card generation call
+BATCH_SIZE = 10
 
 
 # Few-shot examples for card generation
@@ -42,19 +72,59 @@ FEW_SHOT_EXAMPLES = """
 Example 1 - Single hiragana character:
 Input: word="い", english="I (Hiragana)", pos="n."
 Output JSON:
-{"prompt": "I (Hiragana)", "answer": "い", "hint": "2 strokes", "strokeCount": 2, "befuddlers": [{"answers": ["イ"], "toast": "That's katakana!\\nThe prompt asks for hiragana, which is curvy."}, {"answers": ["り"], "toast": "That's \\"RI\\"!\\nThis one has connected strokes."}]}
+{"prompt": "I (Hiragana)", "answer": "い", "hint": "2 strokes", "strokeCount": 2, "id_suffix": "i", "befuddlers": [{"answers": ["イ"], "toast": "That's katakana!\\nThe prompt asks for hiragana, which is curvy."}, {"answers": ["り"], "toast": "That's \\"RI\\"!\\nThis one has connected strokes."}]}
 
 Example 2 - Verb with kanji:
 Input: word="おもう", kanji="思う", english="To Think (Opinion/Feeling)", pos="v."
 Output JSON:
-{"prompt": "To Think (Opinion/Feeling)", "answer": "思う", "hint": "omou - subjective thinking", "strokeCount": null, "befuddlers": [{"answers": ["考える"], "toast": "That's \\"to reason/consider\\"!\\nThis one is for thinking through a problem logically."}, {"answers": ["知っている"], "toast": "That's \\"to know\\"!\\nThis one is about having information, not forming thoughts."}]}
+{"prompt": "To Think (Opinion/Feeling)", "answer": "思う", "hint": "omou - subjective thinking", "strokeCount": null, "id_suffix": "omou", "befuddlers": [{"answers": ["考える"], "toast": "That's \\"to reason/consider\\"!\\nThis one is for thinking through a problem logically."}, {"answers": ["知っている"], "toast": "That's \\"to know\\"!\\nThis one is about having information, not forming thoughts."}]}
 
 Example 3 - Single kanji with no common befuddlers:
 Input: word="さくら", kanji="桜", english="Sakura", pos="n."
 Output JSON:
-{"prompt": "Sakura", "answer": "桜", "hint": "10 strokes", "strokeCount": 10, "befuddlers": []}
+{"prompt": "Sakura", "answer": "桜", "hint": "10 strokes", "strokeCount": 10, "id_suffix": "sakura", "befuddlers": []}
 """
 
+# Card format rules shared by the single-item and batch card prompts
+CARD_RULES = """## Card Format Rules:
+- prompt: The English meaning or description shown to the user (what they need to write in Japanese)
+- answer: The Japanese word the user needs to draw (use kanji form if available, otherwise kana)
+- hint: A helpful hint - can be reading (romaji), stroke count, mnemonic, or usage note
+- strokeCount: ONLY include if the answer is a single kanji or kana character (omit for words/phrases)
+- id_suffix: A short, memorable ID for the card (2-10 characters, lowercase letters, numbers and hyphens only), related to the word; for expressions use a key word, for greetings an abbreviated form (e.g. "thanks", "morning", "goodbye")
+- stage: Always -1 (locked by default)
+- unlocks: Always "9999-12-31T23:59:59+00:00" (far future, unlocked by lessons)
+- befuddlers: Array of similar-looking or commonly confused words/characters that the handwriting API might recognize instead. Each has:
+  - answers: Array with the confused character/word (e.g. ["イ"])
+  - toast: A helpful message explaining the difference (use \\n for newlines). NEVER reveal the correct answer in the toast!
+
+## Guidelines for befuddlers:
+- For expressions/phrases, befuddlers should be similar expressions that might be confused
+- For words with kanji, befuddlers could be words with similar kanji or similar meaning
+- For hiragana/katakana, include the opposite script version and visually similar characters
+- Empty array [] is fine if no good befuddlers exist
+- Maximum 3 befuddlers"""
+
+
+class Befuddler(BaseModel):
+    answers: list[str]
+    toast: str
+
+
+class Card(BaseModel):
+    """Card fields generated by the LLM (schema for structured output)."""
+    prompt: str
+    answer: str
+    hint: str
+    strokeCount: int | None
+    id_suffix: str
+    befuddlers: list[Befuddler]
+
+
+class CardBatch(BaseModel):
+    """One generated card per input item, in input order."""
+    cards: list[Card]
+
 
 def load_dotenv_files():
     """Load .env files from script dir and project root."""
@@ -62,17 +132,51 @@ def load_dotenv_files():
     load_dotenv(PROJECT_ROOT / ".env")
 
 
+class SQLiteLLMCache(BaseCache):
+    """LLM response cache in a local SQLite file.
+
+    LangChain keys entries by the fully formatted prompt and the model
+    parameters, so editing a prompt template or switching model misses.
+    Only chat model generations are stored.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH):
+        # abatch looks up/updates from executor threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(prompt TEXT, llm TEXT, generations TEXT, PRIMARY KEY (prompt, llm))"
+        )
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generations FROM llm_cache WHERE prompt = ? AND llm = ?", (prompt, llm_string)
+            ).fetchone()
+        if row is None:
+            return None
+        return [ChatGeneration(message=m) for m in messages_from_dict(json.loads(row[0]))]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        generations = json.dumps([message_to_dict(g.message) for g in return_val])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)", (prompt, llm_string, generations)
+            )
+
+    def clear(self, **kwargs) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
 def load_csv_vocab(csv_path: Path) -> list[dict]:
     """Load vocabulary from a CSV file."""
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
-    vocab_items = []
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            vocab_items.append(row)
-    return vocab_items
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
 
 
 def create_card_prompt_template() -> ChatPromptTemplate:
@@ -83,23 +187,7 @@ def create_card_prompt_template() -> ChatPromptTemplate:
 Given a Japanese vocabulary word, generate a flashcard card entry. The user will draw the Japanese word/character,
 so the "answer" is what they need to write, and the "prompt" is the English meaning shown to them.
 
-## Card Format Rules:
-- prompt: The English meaning or description shown to the user (what they need to write in Japanese)
-- answer: The Japanese word the user needs to draw (use kanji form if available, otherwise kana)
-- hint: A helpful hint - can be reading (romaji), stroke count, mnemonic, or usage note
-- strokeCount: ONLY include if the answer is a single kanji or kana character (omit for words/phrases)
-- stage: Always -1 (locked by default)
-- unlocks: Always "9999-12-31T23:59:59+00:00" (far future, unlocked by lessons)
-- befuddlers: Array of similar-looking or commonly confused words/characters that the handwriting API might recognize instead. Each has:
-  - answers: Array with the confused character/word (e.g. ["イ"])
-  - toast: A helpful message explaining the difference (use \\n for newlines). NEVER reveal the correct answer in the toast!
-
-## Guidelines for befuddlers:
-- For expressions/phrases, befuddlers should be similar expressions that might be confused
-- For words with kanji, befuddlers could be words with similar kanji or similar meaning
-- For hiragana/katakana, include the opposite script version and visually similar characters
-- Empty array [] is fine if no good befuddlers exist
-- Maximum 3 befuddlers
+{card_rules}
 
 {few_shot_examples}
 
@@ -114,6 +202,7 @@ Return ONLY a valid JSON object with these exact keys:
 - answer (string)
 - hint (string)
 - strokeCount (number or null if not applicable)
+- id_suffix (string)
 - befuddlers (array of objects with "answers" (array) and "toast" keys)
 
 Return ONLY the JSON, no markdown code blocks or other text."""
@@ -121,7 +210,39 @@ Return ONLY the JSON, no markdown code blocks or other text."""
     return ChatPromptTemplate.from_messages([
         ("system", "You are a Japanese language expert creating educational flashcards."),
         ("human", template)
-    ]).partial(few_shot_examples=FEW_SHOT_EXAMPLES)
+    ]).partial(card_rules=CARD_RULES, few_shot_examples=FEW_SHOT_EXAMPLES)
+
+
+def create_batch_card_prompt_template() -> ChatPromptTemplate:
+    """Create the prompt template for generating several cards in one call."""
+
+    template = """You are a Japanese language expert creating flashcards for a handwriting practice app.
+
+Given a list of Japanese vocabulary words, generate a flashcard card entry for each. The user will draw the Japanese word/character,
+so the "answer" is what they need to write, and the "prompt" is the English meaning shown to them.
+
+{card_rules}
+
+{few_shot_examples}
+
+## Input vocabulary items (JSON array of objects with word_kana, kanji_form, pos, english):
+{items_json}
+
+Return a JSON object whose "cards" array has exactly one card per input item, in the same order as the input.
+Each card must have these exact keys:
+- prompt (string)
+- answer (string)
+- hint (string)
+- strokeCount (number or null if not applicable)
+- id_suffix (string)
+- befuddlers (array of objects with "answers" (array) and "toast" keys)
+
+Return ONLY the JSON, no markdown code blocks or other text."""
+
+    return ChatPromptTemplate.from_messages([
+        ("system", "You are a Japanese language expert creating educational flashcards."),
+        ("human", template)
+    ]).partial(card_rules=CARD_RULES, few_shot_examples=FEW_SHOT_EXAMPLES)
 
 
 def create_id_generation_prompt_template() -> ChatPromptTemplate:
@@ -154,43 +275,272 @@ Return ONLY the JSON array, no other text."""
     ])
 
 
-def process_single_card(llm, prompt_template, parser, item: dict) -> dict:
-    """Process a single vocabulary item through the LLM to generate card data."""
-
+def _card_inputs(item: dict) -> dict:
+    """Map a vocabulary CSV row to the card prompt inputs."""
     word_kana = item.get("単語", "")
-    kanji_form = item.get("漢字表記", "") or word_kana
-    pos = item.get("品詞", "")
-    english = item.get("英訳", "")
+    return {
+        "word_kana": word_kana,
+        "kanji_form": item.get("漢字表記", "") or word_kana,
+        "pos": item.get("品詞", ""),
+        "english": item.get("英訳", "")
+    }
 
-    chain = prompt_template | llm | parser
 
-    result = chain.invoke({
-        "word_kana": word_kana,
-        "kanji_form": kanji_form,
-        "pos": pos,
-        "english": english
-    })
+def _card_id(prefix: str, card_data: dict, index: int) -> str:
+    """Card ID from the model's id_suffix, falling back to the item index."""
+    return f"{prefix}{card_data.get('id_suffix') or index}"
 
-    return result
 
+def _batch_inputs(items: list[dict]) -> dict:
+    """Map several vocabulary CSV rows to the batch card prompt inputs."""
+    return {"items_json": json.dumps([_card_inputs(item) for item in items], ensure_ascii=False, indent=2)}
 
-def generate_id_suffixes(llm, prompt_template, parser, cards: list[dict]) -> list[str]:
-    """Generate meaningful ID suffixes for all cards."""
 
-    import json
+async def generate_cards(llm, card_prompt, batch_prompt, vocab_items: list[dict],
+                         prefix: str, batch_size: int, concurrency: int) -> list[dict]:
+    """Generate cards for all vocabulary items, with IDs from the model's id_suffix.
+
+    Batches of `batch_size` items go on a work queue drained by `concurrency`
+    workers, so at most that many calls are in flight. Responses are
+    constrained to the Card/CardBatch schemas via structured output. A batch
+    that fails puts its items back on the queue one at a time, so retries run
+    while other batches are still in flight. Cards come back in input order;
+    items that still fail are reported and skipped.
+    """
+    batch_chain = (
+        batch_prompt
+        | llm.with_structured_output(CardBatch, method="json_schema")
+        | (lambda batch: [card.model_dump() for card in batch.cards])
+    )
+    card_chain = (
+        card_prompt
+        | llm.with_structured_output(Card, method="json_schema")
+        | (lambda card: card.model_dump())
+    )
+
+    total = len(vocab_items)
+    cards: list[dict | Exception | None] = [None] * total
+
+    # Jobs are (start index, items, retry); retry jobs hold a single item
+    queue: asyncio.Queue[tuple[int, list[dict], bool]] = asyncio.Queue()
+    for start in range(0, total, batch_size):
+        queue.put_nowait((start, vocab_items[start:start + batch_size], False))
+
+    async def _run_batch(start: int, items: list[dict]):
+        count = len(items)
+        try:
+            result = await batch_chain.ainvoke(_batch_inputs(items))
+            if len(result) != count:
+                raise ValueError(f"Expected {count} cards, got {len(result)}")
+            cards[start:start + count] = [build_card_yaml(card_data, _card_id(prefix, card_data, start + j))
+                                          for j, card_data in enumerate(result)]
+        except Exception as e:
+            print(f"  [{start+1}-{start+count}/{total}] ✗ Batch error: {e}; retrying individually")
+            for j, item in enumerate(items):
+                queue.put_nowait((start + j, [item], True))
+
+    async def _run_single(i: int, item: dict):
+        try:
+            result = await card_chain.ainvoke(_card_inputs(item))
+            cards[i] = build_card_yaml(result, _card_id(prefix, result, i))
+        except Exception as e:
+            cards[i] = e
+
+    async def _worker():
+        while True:
+            start, items, retry = await queue.get()
+            try:
+                if retry:
+                    await _run_single(start, items[0])
+                else:
+                    await _run_batch(start, items)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(_worker()) for _ in range(concurrency)]
+    # Retries are queued before their failed batch is marked done, so join()
+    # waits for them too
+    await queue.join()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    return _report_cards(vocab_items, cards)
+
+
+def _report_cards(vocab_items: list[dict], cards: list[dict | Exception]) -> list[dict]:
+    """Print a status line per vocabulary item and return the cards that succeeded."""
+    total = len(vocab_items)
+    generated = []
+    for i, (item, card) in enumerate(zip(vocab_items, cards)):
+        label = f"  [{i+1}/{total}] {item.get('単語', '')} - {item.get('英訳', '')}..."
+        if isinstance(card, Exception):
+            print(f"{label} ✗ Error: {card}")
+        else:
+            print(f"{label} ✓")
+            generated.append(card)
+    return generated
+
+
+def _to_openai_messages(messages) -> list[dict]:
+    """Convert formatted LangChain messages to OpenAI chat message dicts."""
+    roles = {"system": "system", "human": "user", "ai": "assistant"}
+    return [{"role": roles[m.type], "content": m.content} for m in messages]
+
+
+def run_prompts_batch_api(prompt_template, parser, inputs: dict[str, dict],
+                          model: str, temperature: float) -> dict[str, object]:
+    """Run a prompt over each input (keyed by custom_id) as one OpenAI Batch API job.
+
+    Returns the parsed response per custom_id, or the exception if it failed.
+    """
+    requests = [
+        build_request(custom_id, model, _to_openai_messages(prompt_template.format_messages(**values)),
+                      temperature=temperature)
+        for custom_id, values in inputs.items()
+    ]
+
+    parsed = {}
+    for custom_id, content in run_batch(requests).items():
+        if isinstance(content, Exception):
+            parsed[custom_id] = content
+            continue
+        try:
+            parsed[custom_id] = parser.parse(content)
+        except Exception as e:
+            parsed[custom_id] = e
+    return parsed
+
+
+def generate_cards_batch_api(card_prompt, parser, vocab_items: list[dict], prefix: str,
+                             model: str, temperature: float) -> list[dict]:
+    """Generate cards for all vocabulary items via the OpenAI Batch API.
+
+    One request per item; items that fail are reported and skipped.
+    """
+    inputs = {f"{prefix}{i}": _card_inputs(item) for i, item in enumerate(vocab_items)}
+    results = run_prompts_batch_api(card_prompt, parser, inputs, model, temperature)
+
+    cards: list[dict | Exception] = []
+    for i, temp_id in enumerate(inputs):
+        try:
+            result = results[temp_id]
+            if isinstance(result, Exception):
+                raise result
+            cards.append(build_card_yaml(result, _card_id(prefix, result, i)))
+        except Exception as e:
+            cards.append(e)
+
+    return _report_cards(vocab_items, cards)
+
+
+def _id_inputs(cards: list[dict]) -> dict:
+    """Map generated cards to the ID suffix prompt inputs."""
     cards_summary = [{"prompt": c["prompt"], "answer": c["answers"][0]} for c in cards]
-    cards_json = json.dumps(cards_summary, ensure_ascii=False, indent=2)
+    return {"cards_json": json.dumps(cards_summary, ensure_ascii=False, indent=2)}
+
+
+def generate_id_suffixes(llm, prompt_template, parser, cards: list[dict]) -> list[str]:
+    """Generate meaningful ID suffixes for all cards."""
 
     chain = prompt_template | llm | parser
 
-    result = chain.invoke({"cards_json": cards_json})
+    result = chain.invoke(_id_inputs(cards))
 
     return result
 
 
+def generate_id_suffixes_batch_api(prompt_template, parser, cards: list[dict],
+                                   model: str, temperature: float) -> list[str]:
+    """Generate meaningful ID suffixes for all cards via the OpenAI Batch API."""
+
+    result = run_prompts_batch_api(prompt_template, parser, {"ids": _id_inputs(cards)},
+                                   model, temperature)["ids"]
+    if isinstance(result, Exception):
+        raise result
+
+    return result
+
+
+def dedupe_suffixes(suffixes: list[str], taken: set[str] = frozenset()) -> list[str]:
+    """Make ID suffixes unique by appending -2, -3, ... to repeats, in order.
+
+    Suffixes in `taken` (e.g. from cards kept by --resume) are never reused.
+    """
+    # next_n remembers the next free counter per base so repeated bases
+    # don't rescan from -2
+    unique = []
+    seen = set(taken)
+    next_n: dict[str, int] = {}
+    for suffix in suffixes:
+        if suffix in seen:
+            n = next_n.get(suffix, 2)
+            while f"{suffix}-{n}" in seen:
+                n += 1
+            next_n[suffix] = n + 1
+            suffix = f"{suffix}-{n}"
+        unique.append(suffix)
+        seen.add(suffix)
+    return unique
+
+
+def load_existing_cards(target_path: Path) -> list[dict]:
+    """Load the cards already written to the target YAML file, if any."""
+    if not target_path.exists():
+        return []
+    return yaml.load(target_path.read_text(encoding="utf-8"), Loader=_Loader) or []
+
+
+# Parenthetical notes like （な）, （～を）, （かぎを）
+_PAREN_RE = re.compile(r"[（(]([^）)]*)[）)]")
+# Wave-dash slot markers and "＋ negative"-style grammar notes
+_SLOT_RE = re.compile(r"[～〜~＋+]")
+
+
+def _match_keys(text: str | None) -> set[str]:
+    """Comparable keys for an answer or CSV word.
+
+    Annotations are both dropped and inlined (けち（な） -> けち, けちな), and
+    the part before a slot marker is kept too (あまり〜ない / あまり ＋ negative -> あまり).
+    """
+    text = "".join((text or "").split())
+    keys = {
+        _SLOT_RE.sub("", _PAREN_RE.sub("", text)),
+        _SLOT_RE.sub("", _PAREN_RE.sub(r"\1", text)),
+        _SLOT_RE.split(_PAREN_RE.sub("", text), 1)[0],
+    }
+    keys.discard("")
+    return keys
+
+
+def match_existing_cards(existing_cards: list[dict], vocab_items: list[dict]
+                         ) -> tuple[list[dict], list[dict]]:
+    """Split vocabulary rows against the cards already written for --resume.
+
+    A row matches a card when a key of its kana or kanji form equals a key of
+    any of the card's answers. Returns (rows_without_a_card,
+    cards_without_a_row); unmatched cards are reported, never dropped.
+    """
+    card_keys = [set().union(*map(_match_keys, card.get("answers", [])))
+                 for card in existing_cards]
+    known = set().union(*card_keys)
+
+    todo = []
+    row_keys = set()
+    for item in vocab_items:
+        keys = _match_keys(item.get("単語")) | _match_keys(item.get("漢字表記"))
+        row_keys |= keys
+        if not keys & known:
+            todo.append(item)
+
+    unmatched = [card for card, keys in zip(existing_cards, card_keys) if not keys & row_keys]
+    return todo, unmatched
+
+
 def normalize_string(s: str) -> str:
     """Normalize a string by converting escaped newlines to actual newlines."""
-    if not isinstance(s, str):
+    # Most fields have no escapes at all; skip the copy for those
+    if not isinstance(s, str) or "\\" not in s:
         return s
     # Convert escaped \n to actual newlines (from JSON responses)
     return s.replace("\\n", "\n")
@@ -239,9 +589,15 @@ def build_card_yaml(card_data: dict, card_id: str) -> dict:
     return card
 
 
-def validate_yaml(cards: list[dict]) -> tuple[bool, list[str]]:
-    """Validate that the cards can be serialized to valid YAML and check for issues."""
+def validate_yaml(cards: list[dict], strict: bool = False) -> tuple[bool, list[str], str]:
+    """Validate that the cards can be serialized to valid YAML and check for issues.
+
+    With strict, also parse the serialized YAML back and check the card count.
+    Returns (valid, issues, yaml_str); yaml_str is the serialized cards, ready
+    to write, or "" if serialization failed.
+    """
     issues = []
+    yaml_str = ""
 
     # Check for escaped newlines that weren't normalized
     for i, card in enumerate(cards):
@@ -258,16 +614,17 @@ def validate_yaml(cards: list[dict]) -> tuple[bool, list[str]]:
             if "\\n" in toast:
                 issues.append(f"{card_id}: befuddler[{j}] toast contains escaped \\n")
 
-    # Try to serialize and parse back
+    # Try to serialize (and, if strict, parse back)
     try:
         yaml_str = yaml.dump(cards, allow_unicode=True, default_flow_style=False, sort_keys=False)
-        parsed = yaml.safe_load(yaml_str)
-        if parsed is None or len(parsed) != len(cards):
-            issues.append("YAML round-trip failed: card count mismatch")
+        if strict:
+            parsed = yaml.load(yaml_str, Loader=_Loader)
+            if parsed is None or len(parsed) != len(cards):
+                issues.append("YAML round-trip failed: card count mismatch")
     except Exception as e:
         issues.append(f"YAML serialization error: {e}")
 
-    return len(issues) == 0, issues
+    return len(issues) == 0, issues, yaml_str
 
 
 def _str_representer(dumper, data):
@@ -281,13 +638,20 @@ def _str_representer(dumper, data):
 yaml.add_representer(str, _str_representer)
 
 
-def write_yaml_file(cards: list[dict], output_path: Path):
-    """Write cards to YAML file with proper formatting."""
+def write_yaml_file(yaml_str: str, output_path: Path):
+    """Write serialized cards (from validate_yaml) to the YAML file."""
     # Ensure parent directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        yaml.dump(cards, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+    output_path.write_text(yaml_str, encoding="utf-8")
+
+
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
 
 
 def main():
@@ -313,14 +677,51 @@ def main():
     parser.add_argument(
         "--model",
         type=str,
-        default="gpt-5.2",
-        help="OpenAI model to use (default: gpt-4o-mini)"
+        default=DEFAULT_MODEL,
+        help=f"OpenAI model to use (default: {DEFAULT_MODEL})"
     )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Process items but don't write to file"
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep cards already in the target file and only generate cards for new rows"
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Also parse the generated YAML back before writing it"
+    )
+    parser.add_argument(
+        "--legacy-ids",
+        action="store_true",
+        help="Generate ID suffixes in a separate LLM call after card generation"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=f"Cache LLM responses in {CACHE_PATH.name} and use temperature 0 so re-runs reuse them"
+    )
+    parser.add_argument(
+        "--use-batch-api",
+        action="store_true",
+        help="Submit requests as OpenAI Batch API jobs (half price, completes within 24h)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=BATCH_SIZE,
+        help=f"Vocabulary items per card generation call (default: {BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=CONCURRENCY,
+        help=f"Maximum concurrent LLM calls (default: {CONCURRENCY})"
+    )
 
     args = parser.parse_args()
 
@@ -340,6 +741,10 @@ def main():
     print(f"Target: {target_path}")
     print(f"Prefix: {args.prefix}")
     print(f"Model: {args.model}")
+    print(f"Batch size: {args.batch_size}")
+    print(f"Concurrency: {args.concurrency}")
+    if args.cache:
+        print(f"Cache: {CACHE_PATH}")
     print()
 
     # Load vocabulary
@@ -350,75 +755,83 @@ def main():
         sys.exit(1)
 
     print(f"Found {len(vocab_items)} vocabulary items")
+
+    # Keep every existing card; only rows without a matching card go to the LLM
+    existing = []
+    if args.resume:
+        existing = load_existing_cards(target_path)
+        vocab_items, unmatched = match_existing_cards(existing, vocab_items)
+        print(f"Resume: keeping {len(existing)} existing cards, {len(vocab_items)} items to generate")
+        if unmatched:
+            print(f"Note: {len(unmatched)} existing cards match no CSV row (kept as is):")
+            for card in unmatched:
+                print(f"  {card['id']}: {', '.join(card.get('answers', []))}")
+
     print()
 
     # Initialize LangChain components
-    llm = ChatOpenAI(model=args.model, temperature=0.3)
+    # Deterministic sampling makes cached responses a faithful stand-in
+    temperature = 0 if args.cache else TEMPERATURE
+    if args.cache:
+        set_llm_cache(SQLiteLLMCache())
+    llm = ChatOpenAI(model=args.model, temperature=temperature)
     card_prompt = create_card_prompt_template()
+    batch_prompt = create_batch_card_prompt_template()
     id_prompt = create_id_generation_prompt_template()
     json_parser = JsonOutputParser()
 
     # Phase 1: Generate cards with temporary IDs
     print("Phase 1: Generating cards...")
-    cards = []
-
-    for i, item in enumerate(vocab_items):
-        word = item.get("単語", "")
-        english = item.get("英訳", "")
-        print(f"  [{i+1}/{len(vocab_items)}] {word} - {english}...", end=" ", flush=True)
-
-        try:
-            card_data = process_single_card(llm, card_prompt, json_parser, item)
-            temp_id = f"{args.prefix}{i}"
-            card = build_card_yaml(card_data, temp_id)
-            cards.append(card)
-            print("✓")
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            continue
+    if not vocab_items:
+        cards = []
+    elif args.use_batch_api:
+        cards = generate_cards_batch_api(card_prompt, json_parser, vocab_items, args.prefix,
+                                         args.model, temperature)
+    else:
+        cards = asyncio.run(generate_cards(llm, card_prompt, batch_prompt, vocab_items,
+                                           args.prefix, args.batch_size, args.concurrency))
 
-    if not cards:
+    if not cards and not existing:
         print("No cards generated. Exiting.")
         sys.exit(1)
 
     print(f"\nGenerated {len(cards)} cards")
     print()
 
-    # Phase 2: Generate meaningful ID suffixes
-    print("Phase 2: Generating meaningful IDs...")
-    try:
-        id_suffixes = generate_id_suffixes(llm, id_prompt, json_parser, cards)
-
-        if len(id_suffixes) != len(cards):
-            print(f"Warning: Got {len(id_suffixes)} IDs for {len(cards)} cards. Using numeric fallback for missing.")
-            while len(id_suffixes) < len(cards):
-                id_suffixes.append(str(len(id_suffixes)))
-
-        # Check for duplicates and fix
-        seen = set()
-        for i, suffix in enumerate(id_suffixes):
-            original = suffix
-            counter = 2
-            while suffix in seen:
-                suffix = f"{original}-{counter}"
-                counter += 1
-            id_suffixes[i] = suffix
-            seen.add(suffix)
-
-        # Update card IDs
-        for i, card in enumerate(cards):
-            card["id"] = f"{args.prefix}{id_suffixes[i]}"
-
-        print("✓ IDs generated")
-    except Exception as e:
-        print(f"✗ Error generating IDs: {e}")
-        print("Keeping numeric IDs as fallback")
+    # Phase 2: IDs. Cards already carry the model's id_suffix from Phase 1;
+    # --legacy-ids asks for all suffixes in a separate call instead.
+    print("Phase 2: Assigning IDs...")
+    id_suffixes = [card["id"][len(args.prefix):] for card in cards]
+    if args.legacy_ids:
+        try:
+            if args.use_batch_api:
+                generated = generate_id_suffixes_batch_api(id_prompt, json_parser, cards,
+                                                           args.model, temperature)
+            else:
+                generated = generate_id_suffixes(llm, id_prompt, json_parser, cards)
+
+            if len(generated) != len(cards):
+                print(f"Warning: Got {len(generated)} IDs for {len(cards)} cards. Using Phase 1 IDs for missing.")
+            id_suffixes[:len(generated)] = generated[:len(cards)]
+            print("✓ IDs generated")
+        except Exception as e:
+            print(f"✗ Error generating IDs: {e}")
+            print("Keeping Phase 1 IDs as fallback")
+
+    # Check for duplicates and fix; kept cards keep their IDs
+    taken = {card["id"][len(args.prefix):] for card in existing}
+    for card, suffix in zip(cards, dedupe_suffixes(id_suffixes, taken)):
+        card["id"] = f"{args.prefix}{suffix}"
+    print("✓ IDs assigned")
 
     print()
 
+    # New cards go after the kept ones so existing card order is stable
+    cards = existing + cards
+
     # Phase 3: Validate and write YAML
     print("Phase 3: Validating YAML...")
-    valid, issues = validate_yaml(cards)
+    valid, issues, yaml_str = validate_yaml(cards, strict=args.strict)
     if valid:
         print("✓ YAML validation passed")
     else:
@@ -429,10 +842,10 @@ def main():
 
     if args.dry_run:
         print("\n--- DRY RUN OUTPUT ---")
-        print(yaml.dump(cards, allow_unicode=True, default_flow_style=False, sort_keys=False))
+        print(yaml_str)
     else:
         print(f"\nWriting to {target_path}...")
-        write_yaml_file(cards, target_path)
+        write_yaml_file(yaml_str, target_path)
         print("✓ Done!")
 
     print(f"\nSummary: {len(cards)} cards written")
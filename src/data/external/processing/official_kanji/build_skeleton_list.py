@@ -1,4 +1,10 @@
-#!/usr/bin/env python3
+#!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "lxml>=5.0.0",
+# ]
+# ///
 """
 Build skeleton YAML card files for joyo and jinmeiyo kanji lists.
 Reads raw CSV files, enriches with KANJIDIC data, and outputs YAML card definitions.
@@ -11,10 +17,25 @@ Skips CJK Compatibility Ideograph variants (U+F900-U+FAFF) when their canonical
 equivalent is already in the lists.
 """
 
+import csv
+import json
+import os
+import sys
 import unicodedata
-import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
 from pathlib import Path
+from typing import NamedTuple, TextIO
 from collections import defaultdict
+from collections.abc import Iterator
+
+try:
+    import lxml.etree as ET
+    HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
 
 # Paths relative to this script
 SCRIPT_DIR = Path(__file__).parent
@@ -22,6 +43,9 @@ RAW_DIR = SCRIPT_DIR.parent.parent / "raw"
 OUTPUT_DIR = SCRIPT_DIR.parent.parent / "processed" / "official_kanji"
 KANJIDIC_PATH = RAW_DIR / "kanjidic2.xml"
 
+# Output file buffer size; grade files are written card by card
+WRITE_BUFFER_SIZE = 1 << 20
+
 SOURCES = [
     {
         "input": RAW_DIR / "joyo-kanji-code-u.csv",
@@ -36,145 +60,178 @@ SOURCES = [
 ]
 
 
-def parse_kanjidic(filepath: Path) -> dict[str, dict]:
-    """
-    Parse KANJIDIC2 XML and return a dictionary keyed by UCS code (lowercase hex).
-    Each entry contains: meanings (English), ja_on readings, ja_kun readings, grade.
-    """
-    print(f"Parsing KANJIDIC from {filepath}...")
-    tree = ET.parse(filepath)
-    root = tree.getroot()
-
-    kanji_data = {}
-
-    for character in root.findall("character"):
-        # Get UCS code
-        ucs_code = None
-        codepoint = character.find("codepoint")
-        if codepoint is not None:
-            for cp_value in codepoint.findall("cp_value"):
-                if cp_value.get("cp_type") == "ucs":
-                    ucs_code = cp_value.text.lower()
-                    break
-
-        if not ucs_code:
-            continue
+# Fixed lines closing every skeleton card, written as one constant block;
+# write_card formats only the id/prompt/answers head. Entries are separated
+# by a blank line.
+_YAML_TAIL = (
+    '  hint: ""\n'
+    "  stage: -1\n"
+    "  unlocks: '9999-12-31T23:59:59+00:00'\n"
+    "  invulnerable: false\n"
+    "  max_stage: -1\n"
+    "  learned: false\n"
+    "  hidden: false\n"
+    "  befuddlers: []\n"
+)
 
-        # Get grade from misc
-        grade = None
-        misc = character.find("misc")
-        if misc is not None:
-            grade_elem = misc.find("grade")
-            if grade_elem is not None and grade_elem.text:
-                grade = int(grade_elem.text)
-
-        # Get readings and meanings from reading_meaning/rmgroup
-        meanings = []
-        ja_on = []
-        ja_kun = []
-
-        reading_meaning = character.find("reading_meaning")
-        if reading_meaning is not None:
-            for rmgroup in reading_meaning.findall("rmgroup"):
-                # Get readings
-                for reading in rmgroup.findall("reading"):
-                    r_type = reading.get("r_type")
-                    if r_type == "ja_on":
-                        ja_on.append(reading.text)
-                    elif r_type == "ja_kun":
-                        ja_kun.append(reading.text)
-
-                # Get English meanings (no m_lang attribute means English)
-                for meaning in rmgroup.findall("meaning"):
-                    if meaning.get("m_lang") is None:
-                        meanings.append(meaning.text)
-
-        kanji_data[ucs_code] = {
-            "meanings": meanings,
-            "ja_on": ja_on,
-            "ja_kun": ja_kun,
-            "grade": grade,
-        }
-
-    print(f"  Loaded {len(kanji_data)} kanji entries from KANJIDIC")
-    return kanji_data
-
-
-def parse_csv(filepath: Path) -> list[tuple[str, str]]:
-    """
-    Parse the kanji CSV file and return list of (kanji, unicode_id) tuples.
-    Unicode ID is extracted without the 'U+' prefix.
-    """
-    entries = []
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            # Skip comments and empty lines
-            if not line or line.startswith("#"):
-                continue
 
-            parts = line.split(",")
-            if len(parts) >= 6:
-                kanji = parts[0]
-                unicode_code = parts[5]  # e.g., "U+4E9C"
-                # Remove "U+" prefix
-                unicode_id = unicode_code.replace("U+", "").lower()
-                entries.append((kanji, unicode_id))
+class Kanjidic(NamedTuple):
+    """KANJIDIC fields as parallel dictionaries keyed by UCS codepoint."""
+    grades: dict[int, int | None]
+    meanings: dict[int, tuple[str, ...]]
+    ja_on: dict[int, tuple[str, ...]]
+    ja_kun: dict[int, tuple[str, ...]]
 
-    return entries
 
+def iter_kanjidic_characters(filepath: Path) -> Iterator:
+    """
+    Yield each complete <character> element of KANJIDIC2, freeing it (and
+    everything parsed before it) once the caller moves on.
 
-def get_canonical_char(char: str) -> str | None:
+    Uses lxml when installed and falls back to the stdlib iterparse otherwise.
     """
-    Get the canonical equivalent of a CJK Compatibility Ideograph.
-    Returns None if the character is not a compatibility ideograph or has no decomposition.
+    if HAVE_LXML:
+        # Skip whitespace-only text between tags and don't build an ID table;
+        # huge_tree lifts libxml2's size limits for the multi-MB file
+        context = ET.iterparse(
+            str(filepath), events=("end",), tag="character",
+            remove_blank_text=True, collect_ids=False, huge_tree=True,
+        )
+        for _, character in context:
+            yield character
+            character.clear()
+            while character.getprevious() is not None:
+                del character.getparent()[0]
+        return
+
+    # stdlib: no tag filter, so grab the root from the first start event and
+    # drop finished characters (and the header) from it
+    context = ET.iterparse(filepath, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == "character":
+            yield elem
+            root.clear()
+
+
+def parse_kanjidic(filepath: Path) -> Kanjidic:
     """
-    codepoint = ord(char)
-    # CJK Compatibility Ideographs: U+F900-U+FAFF
-    if not (0xF900 <= codepoint <= 0xFAFF):
-        return None
-
-    decomp = unicodedata.decomposition(char)
-    if not decomp:
-        return None
-
-    # Decomposition format is like "<compat> 50E7" - last part is canonical codepoint
-    parts = decomp.split()
-    if parts:
-        try:
-            canon_codepoint = int(parts[-1], 16)
-            return chr(canon_codepoint)
-        except ValueError:
-            return None
-    return None
-
+    Parse KANJIDIC2 XML into per-field dictionaries keyed by UCS codepoint (int):
+    grade (every character), and meanings (English), ja_on and ja_kun readings
+    as tuples (only characters that have any).
 
-def filter_duplicate_variants(
-    entries: list[tuple[str, str]], all_chars: set[str]
-) -> tuple[list[tuple[str, str]], list[str]]:
+    Streams the file, handling each <character> once it is complete and then
+    discarding it, so only one subtree is in memory at a time.
     """
-    Filter out CJK Compatibility Ideograph variants whose canonical equivalent
-    is already in the character set.
-
-    Returns (filtered_entries, list_of_skipped_messages).
+    kanjidic = Kanjidic({}, {}, {}, {})
+    grades, meanings_by, ja_on_by, ja_kun_by = kanjidic
+
+    for character in iter_kanjidic_characters(filepath):
+        ucs_code = grade = None
+        meanings, ja_on, ja_kun = [], [], []
+        meanings_append, ja_on_append, ja_kun_append = meanings.append, ja_on.append, ja_kun.append
+
+        # One pass over the character's children instead of a find per section
+        for section in character:
+            tag = section.tag
+            if tag == "codepoint":
+                # UCS code from codepoint
+                for cp_value in section:
+                    if cp_value.get("cp_type") == "ucs":
+                        ucs_code = int(cp_value.text, 16)
+                        break
+            elif tag == "misc":
+                # Grade from misc
+                for child in section:
+                    if child.tag == "grade":
+                        if child.text:
+                            grade = int(child.text)
+                        break
+            elif tag == "reading_meaning":
+                # Readings and meanings from reading_meaning/rmgroup
+                for rmgroup in section:
+                    if rmgroup.tag != "rmgroup":
+                        continue
+                    for child in rmgroup:
+                        tag = child.tag
+                        if tag == "reading":
+                            r_type = child.get("r_type")
+                            if r_type == "ja_on":
+                                ja_on_append(child.text)
+                            elif r_type == "ja_kun":
+                                ja_kun_append(child.text)
+                        elif tag == "meaning" and child.get("m_lang") is None:
+                            # No m_lang attribute means English
+                            meanings_append(child.text)
+
+        if ucs_code is not None:
+            grades[ucs_code] = grade
+            if meanings:
+                meanings_by[ucs_code] = tuple(meanings)
+            if ja_on:
+                ja_on_by[ucs_code] = tuple(ja_on)
+            if ja_kun:
+                ja_kun_by[ucs_code] = tuple(ja_kun)
+
+    return kanjidic
+
+
+def _csv_rows(f: TextIO) -> Iterator[list[str]]:
+    """Yield the data rows of a kanji CSV file, skipping comments, empty lines and short rows."""
+    for row in csv.reader(f):
+        if row and not row[0].startswith("#") and len(row) >= 6:
+            yield row
+
+
+def scan_csv_chars(filepath: Path) -> set[str]:
+    """Return the set of kanji in a CSV file (for duplicate detection)."""
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        return {row[0] for row in _csv_rows(f)}
+
+
+def iter_csv(filepath: Path) -> Iterator[tuple[str, int]]:
     """
-    filtered = []
-    skipped = []
+    Yield (kanji, unicode_id) tuples from a kanji CSV file.
+    Unicode ID is the codepoint as an int, parsed from the "U+XXXX" column.
+    """
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        for row in _csv_rows(f):
+            unicode_code = row[5]  # e.g., "U+4E9C"
+            # Strip the "U+" prefix every row carries
+            if not unicode_code.startswith("U+"):
+                raise ValueError(f"{filepath.name}: expected a U+XXXX code in column 6, got row {row}")
+            yield row[0], int(unicode_code[2:], 16)
+
+
+# CJK Compatibility Ideograph (U+F900-U+FAFF) -> canonical equivalent.
+# NFKC maps each variant straight to its canonical character; the few unified
+# ideographs in the block normalize to themselves and are left out.
+COMPAT_TO_CANONICAL = {
+    char: canonical
+    for cp in range(0xF900, 0xFB00)
+    if (canonical := unicodedata.normalize("NFKC", char := chr(cp))) != char
+}
+
+
+def canonical_duplicate(kanji: str, all_chars: set[str]) -> str | None:
+    """
+    Return the canonical equivalent of a CJK Compatibility Ideograph variant
+    if it is already in the character set, else None.
+    """
+    # Only U+F900-U+FAFF can be variants; skip everything else cheaply
+    if not 0xF900 <= ord(kanji) <= 0xFAFF:
+        return None
 
-    for kanji, unicode_id in entries:
-        canonical = get_canonical_char(kanji)
-        if canonical and canonical in all_chars:
-            skipped.append(
-                f"  SKIPPED: {kanji} (U+{unicode_id.upper()}) - "
-                f"duplicate of canonical {canonical}"
-            )
-        else:
-            filtered.append((kanji, unicode_id))
+    canonical = COMPAT_TO_CANONICAL.get(kanji)
+    return canonical if canonical is not None and canonical in all_chars else None
 
-    return filtered, skipped
 
+def _join_top(items: tuple[str, ...], n: int) -> str:
+    """Join the first n items with ", " without copying them."""
+    return ", ".join(islice(items, n))
 
-def build_prompt(kanji_info: dict | None, kanji: str, unicode_id: str) -> tuple[str, list[str]]:
+
+def build_prompt(kanjidic: Kanjidic, kanji: str, unicode_id: int) -> tuple[str, list[str]]:
     """
     Build a multi-line prompt from KANJIDIC data.
     Line 1: Meanings: top 3 meanings
@@ -183,159 +240,192 @@ def build_prompt(kanji_info: dict | None, kanji: str, unicode_id: str) -> tuple[
 
     Returns (prompt_string, list_of_warnings).
     """
-    warnings = []
+    if unicode_id not in kanjidic.grades:
+        return "", [f"  WARNING: {kanji} (U+{unicode_id:04X}) not found in KANJIDIC"]
 
-    if not kanji_info:
-        warnings.append(f"  WARNING: {kanji} (U+{unicode_id.upper()}) not found in KANJIDIC")
-        return "", warnings
+    meanings = kanjidic.meanings.get(unicode_id, ())
+    ja_on = kanjidic.ja_on.get(unicode_id, ())
+    ja_kun = kanjidic.ja_kun.get(unicode_id, ())
 
     lines = []
-
-    meanings = kanji_info.get("meanings", [])[:3]
     if meanings:
-        lines.append(f"Meanings: {', '.join(meanings)}")
-    else:
-        warnings.append(f"  WARNING: {kanji} (U+{unicode_id.upper()}) has no meanings")
-
-    ja_on = kanji_info.get("ja_on", [])[:4]
+        lines.append(f"Meanings: {_join_top(meanings, 3)}")
     if ja_on:
-        lines.append(f"Onyomi: {', '.join(ja_on)}")
-    else:
-        warnings.append(f"  WARNING: {kanji} (U+{unicode_id.upper()}) has no onyomi readings")
-
-    ja_kun = kanji_info.get("ja_kun", [])[:4]
+        lines.append(f"Onyomi: {_join_top(ja_on, 4)}")
     if ja_kun:
-        lines.append(f"Kunyomi: {', '.join(ja_kun)}")
-    else:
-        warnings.append(f"  WARNING: {kanji} (U+{unicode_id.upper()}) has no kunyomi readings")
-
-    return "\\n".join(lines), warnings
+        lines.append(f"Kunyomi: {_join_top(ja_kun, 4)}")
 
-
-def generate_yaml(
-    entries: list[tuple[str, str]], id_prefix: str, kanjidic: dict[str, dict]
-) -> tuple[str, list[str]]:
-    """Generate YAML content for the kanji entries. Returns (yaml_content, warnings)."""
-    lines = []
-    all_warnings = []
-
-    for kanji, unicode_id in entries:
-        kanji_info = kanjidic.get(unicode_id)
-        prompt, warnings = build_prompt(kanji_info, kanji, unicode_id)
-        all_warnings.extend(warnings)
-
-        lines.append(f"- id: k-{id_prefix}-{unicode_id}")
-        lines.append(f'  prompt: "{prompt}"')
-        lines.append(f"  answers:")
-        lines.append(f"    - {kanji}")
-        lines.append(f'  hint: ""')
-        lines.append(f"  stage: -1")
-        lines.append(f"  unlocks: '9999-12-31T23:59:59+00:00'")
-        lines.append(f"  invulnerable: false")
-        lines.append(f"  max_stage: -1")
-        lines.append(f"  learned: false")
-        lines.append(f"  hidden: false")
-        lines.append(f"  befuddlers: []")
-        lines.append("")  # Blank line between entries
-
-    return "\n".join(lines), all_warnings
-
-
-def group_by_grade(
-    entries: list[tuple[str, str]], kanjidic: dict[str, dict], expected_grades: list[int]
-) -> tuple[dict[int, list[tuple[str, str]]], list[tuple[str, str]]]:
+    # Warnings are rare, so only format the codepoint when one fires
+    warnings = []
+    if not (meanings and ja_on and ja_kun):
+        label = f"  WARNING: {kanji} (U+{unicode_id:04X})"
+        if not meanings:
+            warnings.append(f"{label} has no meanings")
+        if not ja_on:
+            warnings.append(f"{label} has no onyomi readings")
+        if not ja_kun:
+            warnings.append(f"{label} has no kunyomi readings")
+
+    return "\n".join(lines), warnings
+
+
+def write_card(
+    out: TextIO, id_prefix: str, kanji: str, unicode_id: int, kanjidic: Kanjidic
+) -> list[str]:
+    """Write one YAML card to out as a single formatted block. Returns warnings."""
+    prompt, warnings = build_prompt(kanjidic, kanji, unicode_id)
+
+    # The prompt is a JSON string, which is also a valid YAML double-quoted scalar
+    out.write(
+        f"- id: k-{id_prefix}-{unicode_id:04x}\n"
+        f"  prompt: {json.dumps(prompt, ensure_ascii=False)}\n"
+        "  answers:\n"
+        f"    - {kanji}\n"
+    )
+    out.write(_YAML_TAIL)
+    return warnings
+
+
+def output_path(id_prefix: str, grade: int) -> Path:
+    """Path of the skeleton file for one source and grade."""
+    return OUTPUT_DIR / f"kanji_skeleton_{id_prefix}_gr{grade}.yaml"
+
+
+def process_source(
+    source: dict, all_chars: set[str], kanjidic: Kanjidic
+) -> tuple[list[str], int, int, int, int]:
     """
-    Group entries by their KANJIDIC grade.
-    Returns (grade_groups, no_grade_entries).
+    Stream one source's CSV once, skipping duplicate variants and writing each
+    kanji straight into its grade file.
+    Returns (log_lines, written, skipped, no_grade, warnings); the log is
+    returned rather than printed so parallel sources don't interleave.
     """
-    grade_groups: dict[int, list[tuple[str, str]]] = defaultdict(list)
+    id_prefix = source["id_prefix"]
+    expected_grades = source["expected_grades"]
+
+    found = 0
+    skipped = []
     no_grade = []
+    grade_counts: dict[int, int] = {}
+    grade_warnings: dict[int, list[str]] = defaultdict(list)
+    files: dict[int, TextIO] = {}
+
+    with ExitStack() as stack:
+        for kanji, unicode_id in iter_csv(source["input"]):
+            found += 1
+
+            # Filter out duplicate variants
+            canonical = canonical_duplicate(kanji, all_chars)
+            if canonical is not None:
+                skipped.append(
+                    f"  SKIPPED: {kanji} (U+{unicode_id:04X}) - "
+                    f"duplicate of canonical {canonical}"
+                )
+                continue
 
-    for kanji, unicode_id in entries:
-        kanji_info = kanjidic.get(unicode_id)
-        if kanji_info and kanji_info.get("grade") is not None:
-            grade = kanji_info["grade"]
-            grade_groups[grade].append((kanji, unicode_id))
-        else:
-            no_grade.append((kanji, unicode_id))
+            # Group by grade
+            grade = kanjidic.grades.get(unicode_id)
+            if grade is None:
+                no_grade.append((kanji, unicode_id))
+                continue
 
-    return dict(grade_groups), no_grade
+            count = grade_counts.get(grade, 0)
+            grade_counts[grade] = count + 1
+            if grade not in expected_grades:
+                continue
 
+            # Grade files are opened on their first kanji, with a 1 MiB buffer
+            # so the per-card writes reach disk in a few large chunks; cards
+            # are separated by a blank line
+            out = files.get(grade)
+            if out is None:
+                out = files[grade] = stack.enter_context(open(
+                    os.fspath(output_path(id_prefix, grade)), "w",
+                    encoding="utf-8", buffering=WRITE_BUFFER_SIZE,
+                ))
+            if count:
+                out.write("\n")
+            warnings = write_card(out, id_prefix, kanji, unicode_id, kanjidic)
+            if warnings:
+                grade_warnings[grade].extend(warnings)
 
-def main():
-    # Ensure output directory exists
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    log = []
+    say = log.append
+    total_warnings = 0
+    total_written = 0
 
-    # Load KANJIDIC data
-    kanjidic = parse_kanjidic(KANJIDIC_PATH)
+    say(f"\nProcessing {source['input'].name}...")
+    say(f"  Found {found} kanji in source")
 
-    # First pass: collect all characters from all sources
-    all_entries = {}
-    for source in SOURCES:
-        entries = parse_csv(source["input"])
-        all_entries[source["id_prefix"]] = entries
+    if skipped:
+        log.extend(skipped)
+        say(f"  Filtered to {found - len(skipped)} kanji (skipped {len(skipped)} duplicates)")
 
-    # Build set of all characters (for duplicate detection)
-    all_chars = set()
-    for entries in all_entries.values():
-        for kanji, _ in entries:
-            all_chars.add(kanji)
+    if no_grade:
+        say(f"  WARNING: {len(no_grade)} kanji have no grade in KANJIDIC:")
+        for kanji, unicode_id in no_grade:
+            say(f"    {kanji} (U+{unicode_id:04X})")
 
-    total_warnings = 0
-    total_skipped = 0
-    total_written = 0
-    total_no_grade = 0
+    # Check for unexpected grades
+    for grade, count in grade_counts.items():
+        if grade not in expected_grades:
+            say(f"  WARNING: Found {count} kanji with unexpected grade {grade}")
 
-    for source in SOURCES:
-        print(f"\nProcessing {source['input'].name}...")
+    for grade in expected_grades:
+        count = grade_counts.get(grade, 0)
+        if not count:
+            say(f"  Grade {grade}: 0 kanji (skipping file)")
+            continue
 
-        entries = all_entries[source["id_prefix"]]
-        print(f"  Found {len(entries)} kanji in source")
+        warnings = grade_warnings.get(grade)
+        if warnings:
+            log.extend(warnings)
+            total_warnings += len(warnings)
 
-        # Filter out duplicate variants
-        filtered_entries, skipped = filter_duplicate_variants(entries, all_chars)
-        if skipped:
-            for msg in skipped:
-                print(msg)
-            total_skipped += len(skipped)
-            print(f"  Filtered to {len(filtered_entries)} kanji (skipped {len(skipped)} duplicates)")
+        say(f"  Grade {grade}: {count} kanji -> {output_path(id_prefix, grade).name}")
+        total_written += count
 
-        # Group by grade
-        grade_groups, no_grade = group_by_grade(
-            filtered_entries, kanjidic, source["expected_grades"]
-        )
+    return log, total_written, len(skipped), len(no_grade), total_warnings
 
-        if no_grade:
-            print(f"  WARNING: {len(no_grade)} kanji have no grade in KANJIDIC:")
-            for kanji, unicode_id in no_grade:
-                print(f"    {kanji} (U+{unicode_id.upper()})")
-            total_no_grade += len(no_grade)
-
-        # Check for unexpected grades
-        for grade in grade_groups:
-            if grade not in source["expected_grades"]:
-                print(f"  WARNING: Found {len(grade_groups[grade])} kanji with unexpected grade {grade}")
-
-        # Generate files for each expected grade
-        for grade in source["expected_grades"]:
-            grade_entries = grade_groups.get(grade, [])
-            if not grade_entries:
-                print(f"  Grade {grade}: 0 kanji (skipping file)")
-                continue
 
-            yaml_content, warnings = generate_yaml(grade_entries, source["id_prefix"], kanjidic)
+def main():
+    # Ensure output directory exists
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-            if warnings:
-                for warning in warnings:
-                    print(warning)
-                total_warnings += len(warnings)
+    # Load KANJIDIC data and, in parallel, collect all characters from all
+    # sources (first pass). Parsing is CPU-bound, so use processes.
+    print(f"Parsing KANJIDIC from {KANJIDIC_PATH}...")
+    with ProcessPoolExecutor(max_workers=1 + len(SOURCES)) as executor:
+        kanjidic_future = executor.submit(parse_kanjidic, KANJIDIC_PATH)
+        char_futures = [executor.submit(scan_csv_chars, source["input"]) for source in SOURCES]
+
+        kanjidic = kanjidic_future.result()
+        # Set of all characters (for duplicate detection)
+        all_chars = set()
+        for future in char_futures:
+            all_chars.update(future.result())
+    print(f"  Loaded {len(kanjidic.grades)} kanji entries from KANJIDIC")
+
+    # Sources are independent once KANJIDIC is loaded; process them together
+    # and print each one's log in order afterwards
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as executor:
+        results = list(executor.map(
+            lambda source: process_source(source, all_chars, kanjidic),
+            SOURCES,
+        ))
 
-            output_file = OUTPUT_DIR / f"kanji_skeleton_{source['id_prefix']}_gr{grade}.yaml"
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(yaml_content)
+    total_warnings = 0
+    total_skipped = 0
+    total_written = 0
+    total_no_grade = 0
 
-            print(f"  Grade {grade}: {len(grade_entries)} kanji -> {output_file.name}")
-            total_written += len(grade_entries)
+    for log, written, skipped, no_grade, warnings in results:
+        # One write per source rather than a print per skip/warning line
+        sys.stdout.write("\n".join(log) + "\n")
+        total_written += written
+        total_skipped += skipped
+        total_no_grade += no_grade
+        total_warnings += warnings
 
     print(f"\n{'='*50}")
     print(f"Total kanji written: {total_written}")